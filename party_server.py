@@ -4,12 +4,12 @@
 #   .venv\Scripts\activate
 #   pip install flask waitress
 # Optional:
-#   pip install openai qrcode[pil]
+#   pip install openai qrcode[pil] orjson
 #   set OPENAI_API_KEY=your_key
 # Run:
 #   py party_server.py --port 5000
 # New features: timer auto-advance + locking, teams, lobby code + reclaim, profanity filter,
-# recap export, Spyfall Lite + Mafia/Werewolf, public polling, and UI polish.
+# recap export, Spyfall Lite + Mafia/Werewolf, host/player SSE push (polling fallback), and UI polish.
 # Spyfall: Start round -> players see roles -> host clicks "Start Spy Vote" -> Reveal Results.
 # Mafia: Start round (night) -> werewolves pick + seer inspects -> host "Resolve Night/Start Day"
 #        -> day vote -> host "Resolve Day" (repeat) -> End Game/Next Round.
@@ -18,10 +18,14 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import base64
 import copy
-import datetime
+import functools
+import gzip
+import hashlib
 import io
+import itertools
 import json
 import os
 import random
@@ -31,23 +35,27 @@ import socket
 import sys
 import threading
 import time
+import types
 import uuid
 import unittest
-from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 # Flask is optional for --test; FLASK_AVAILABLE gates route registration.
 # Run unit tests without Flask via: py party_server.py --test
 try:
-    from flask import Flask, jsonify, make_response, redirect, render_template_string, request, url_for
+    from flask import Flask, current_app, make_response, redirect, request, url_for
+    from markupsafe import Markup, escape
 
     FLASK_AVAILABLE = True
 except ModuleNotFoundError:
     FLASK_AVAILABLE = False
     Flask = None  # type: ignore[assignment]
-    jsonify = None  # type: ignore[assignment]
+    current_app = None  # type: ignore[assignment]
+    escape = None  # type: ignore[assignment]
     make_response = None  # type: ignore[assignment]
+    Markup = None  # type: ignore[assignment]
     redirect = None  # type: ignore[assignment]
-    render_template_string = None  # type: ignore[assignment]
     request = None  # type: ignore[assignment]
     url_for = None  # type: ignore[assignment]
 
@@ -58,59 +66,101 @@ try:
 except Exception:
     HAS_QR = False
 
+try:
+    import openai  # type: ignore
+
+    HAS_OPENAI = True
+    # openai>=1.0 exposes a client class; older releases only have module-level calls.
+    OPENAI_CLIENT_API = hasattr(openai, "OpenAI")
+except Exception:
+    HAS_OPENAI = False
+    OPENAI_CLIENT_API = False
+
+try:
+    import jiter  # type: ignore
+
+    HAS_JITER = True
+except Exception:
+    HAS_JITER = False
+
+try:
+    import orjson  # type: ignore
+
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
 APP_TITLE = "Party Hub"
 
-MODE_LABELS = {
-    "mlt": "Most Likely To",
-    "wyr": "Would You Rather",
-    "trivia": "Trivia",
-    "trivia_buzzer": "Trivia Buzzer",
-    "team_trivia": "Team Trivia Buzzer",
-    "team_jeopardy": "Team Jeopardy",
-    "relay_trivia": "Relay Trivia",
-    "trivia_draft": "Trivia Draft",
-    "wager_trivia": "Wager Trivia",
-    "estimation_duel": "Estimation Duel",
-    "hotseat": "Hot Seat",
-    "wavelength": "Wavelength",
-    "quickdraw": "Quick Draw",
-    "votebattle": "Vote Battle",
-    "spyfall": "Spyfall Lite",
-    "mafia": "Mafia/Werewolf",
-}
+MODE_LABELS = types.MappingProxyType(
+    {
+        "mlt": "Most Likely To",
+        "wyr": "Would You Rather",
+        "trivia": "Trivia",
+        "trivia_buzzer": "Trivia Buzzer",
+        "team_trivia": "Team Trivia Buzzer",
+        "team_jeopardy": "Team Jeopardy",
+        "relay_trivia": "Relay Trivia",
+        "trivia_draft": "Trivia Draft",
+        "wager_trivia": "Wager Trivia",
+        "estimation_duel": "Estimation Duel",
+        "hotseat": "Hot Seat",
+        "wavelength": "Wavelength",
+        "quickdraw": "Quick Draw",
+        "votebattle": "Vote Battle",
+        "spyfall": "Spyfall Lite",
+        "mafia": "Mafia/Werewolf",
+    }
+)
 
-PHASE_LABELS = {
-    "lobby": "Lobby",
-    "in_round": "In Round",
-    "revealed": "Revealed",
-}
+PHASE_LABELS = types.MappingProxyType(
+    {
+        "lobby": "Lobby",
+        "in_round": "In Round",
+        "revealed": "Revealed",
+    }
+)
 
-MODE_DESCRIPTIONS = {
-    "mlt": "Vote for a player who best fits the prompt.",
-    "wyr": "Pick option A or B.",
-    "trivia": "Answer the question. Correct gets a point.",
-    "trivia_buzzer": "Buzz in first to answer and steal points.",
-    "team_trivia": "Teams buzz in and answer first.",
-    "team_jeopardy": "Pick clues, buzz in, and score by team.",
-    "relay_trivia": "Captains rotate and answer for their team.",
-    "trivia_draft": "Draft questions, answer your picks, and steal.",
-    "wager_trivia": "Wager points before answering.",
-    "estimation_duel": "Closest estimate wins the duel.",
-    "hotseat": "Write a short answer. Host can award a point.",
-    "wavelength": "Guess the secret target on the spectrum.",
-    "quickdraw": "Short answer challenge. Unique or host-picked wins.",
-    "votebattle": "Submit an entry, then vote for your favorite.",
-    "spyfall": "Secret roles. Find the spy, then vote.",
-    "mafia": "Night/day social deduction. Werewolves vs villagers.",
-}
+MODE_DESCRIPTIONS = types.MappingProxyType(
+    {
+        "mlt": "Vote for a player who best fits the prompt.",
+        "wyr": "Pick option A or B.",
+        "trivia": "Answer the question. Correct gets a point.",
+        "trivia_buzzer": "Buzz in first to answer and steal points.",
+        "team_trivia": "Teams buzz in and answer first.",
+        "team_jeopardy": "Pick clues, buzz in, and score by team.",
+        "relay_trivia": "Captains rotate and answer for their team.",
+        "trivia_draft": "Draft questions, answer your picks, and steal.",
+        "wager_trivia": "Wager points before answering.",
+        "estimation_duel": "Closest estimate wins the duel.",
+        "hotseat": "Write a short answer. Host can award a point.",
+        "wavelength": "Guess the secret target on the spectrum.",
+        "quickdraw": "Short answer challenge. Unique or host-picked wins.",
+        "votebattle": "Submit an entry, then vote for your favorite.",
+        "spyfall": "Secret roles. Find the spy, then vote.",
+        "mafia": "Night/day social deduction. Werewolves vs villagers.",
+    }
+)
 
 TEXT_MAX_LEN = 120
 QUICKDRAW_MAX_LEN = 40
 VOTEBATTLE_MAX_LEN = 80
 NAME_MAX_LEN = 24
 PUBLIC_POLL_MS = 2500
+PUBLIC_POLL_MAX_MS = 10000
 HOST_POLL_MS = 2000
 HOST_TIMER_POLL_MS = 1000
+SSE_KEEPALIVE_SECONDS = 15
+QR_DISPLAY_PX = 128
+SSE_STREAM_SECONDS = 30
+# Each open event stream pins a waitress worker thread, so streams only get the threads left over
+# after these are kept free for joins, submits and host actions. Everyone else polls.
+SSE_REQUEST_THREADS = 8
+SSE_MAX_STREAMS = 24
+GZIP_MIN_BYTES = 500
+GZIP_MIMETYPES = frozenset({"text/html", "text/css", "text/javascript"})
+# Sized by concurrent clients rather than cores: the request threads plus one per open stream.
+SERVER_THREADS = SSE_REQUEST_THREADS + SSE_MAX_STREAMS
 JOIN_CODE_LENGTH = 5
 TIMER_DEFAULT_SECONDS = 45
 VOTE_TIMER_DEFAULT_SECONDS = 30
@@ -123,34 +173,48 @@ def env_flag(name: str, default: bool) -> bool:
     return value.strip().lower() in ("1", "true", "yes", "on")
 
 
+DOTENV_LINE_RE = re.compile(
+    r"^[^\S\n]*(?:(?i:export) [^\S\n]*(?=[^\s=])|(?!(?i:export) )(?=[^\s=#]))([^=\n]*?)[^\S\n]*=[^\S\n]*(.*?)[^\S\n]*$",
+    re.M,
+)
+
+
 def load_dotenv(path: str = ".env") -> None:
     if not os.path.isfile(path):
         return
     try:
         with open(path, "r", encoding="utf-8") as handle:
-            for raw_line in handle:
-                line = raw_line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                if line.lower().startswith("export "):
-                    line = line[7:].lstrip()
-                if "=" not in line:
-                    continue
-                key, value = line.split("=", 1)
-                key = key.strip()
-                if not key:
-                    continue
-                value = value.strip()
-                if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
-                    value = value[1:-1]
-                os.environ.setdefault(key, value)
+            data = handle.read()
     except OSError:
         return
+    for match in DOTENV_LINE_RE.finditer(data):
+        key, value = match.groups()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
+            value = value[1:-1]
+        os.environ.setdefault(key, value)
 
 
 load_dotenv()
 HOST_LOCALONLY = env_flag("HOST_LOCALONLY", True)
+OPENAI_API_KEY = ""
+OPENAI_MODEL = "gpt-4o-mini"
+OPENAI_READY = False
+
+
+def load_openai_config() -> None:
+    # Read once at startup; call again after changing the environment to rotate the key.
+    global OPENAI_API_KEY, OPENAI_MODEL, OPENAI_READY
+    OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
+    OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+    OPENAI_READY = bool(OPENAI_API_KEY) and HAS_OPENAI
+
+
+load_openai_config()
 LOBBY_CODE_CHARS = "ABCDEFGHJKLMNPQRSTUVWXYZ"
+# Maps a random byte straight to a code letter; bytes past the last whole multiple of the
+# alphabet size are dropped (rejection sampling) so every letter is equally likely.
+LOBBY_CODE_TABLE = bytes(ord(LOBBY_CODE_CHARS[value % len(LOBBY_CODE_CHARS)]) for value in range(256))
+LOBBY_CODE_REJECT = bytes(range(256 - 256 % len(LOBBY_CODE_CHARS), 256))
 BANNED_WORDS_MILD = {
     "crap",
     "damn",
@@ -166,9 +230,22 @@ BANNED_WORDS_STRICT = BANNED_WORDS_MILD.union(
         "shit",
     }
 )
+
+
+def compile_banned_pattern(words: Set[str]) -> re.Pattern:
+    alternation = "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+    return re.compile(rf"(?<![a-z])(?:{alternation})(?![a-z])", re.IGNORECASE | re.ASCII)
+
+
+BANNED_PATTERNS: Dict[str, Optional[re.Pattern]] = {
+    "off": None,
+    "mild": compile_banned_pattern(BANNED_WORDS_MILD),
+    "strict": compile_banned_pattern(BANNED_WORDS_STRICT),
+}
+
 MAFIA_MIN_PLAYERS = 3
 
-MLT_PROMPTS: List[str] = [
+MLT_PROMPTS: Tuple[str, ...] = (
     "Who is most likely to forget their own birthday?",
     "Who is most likely to start a dance-off?",
     "Who is most likely to be late but still arrive with snacks?",
@@ -189,9 +266,9 @@ MLT_PROMPTS: List[str] = [
     "Who is most likely to volunteer for a scary challenge?",
     "Who is most likely to get a hole-in-one by accident?",
     "Who is most likely to plan the perfect party?",
-]
+)
 
-WYR_PROMPTS: List[Dict[str, str]] = [
+WYR_PROMPTS: Tuple[Dict[str, str], ...] = (
     {"a": "Have pizza for every meal", "b": "Have tacos for every meal"},
     {"a": "Be able to pause time", "b": "Be able to rewind time"},
     {"a": "Always have to sing instead of speak", "b": "Always have to dance when you walk"},
@@ -207,9 +284,9 @@ WYR_PROMPTS: List[Dict[str, str]] = [
     {"a": "Be able to talk to animals", "b": "Be able to talk to plants"},
     {"a": "Have a rewind button for your day", "b": "Have a skip button for your day"},
     {"a": "Explore the ocean", "b": "Explore space"},
-]
+)
 
-TRIVIA_QUESTIONS: List[Dict[str, Any]] = [
+TRIVIA_QUESTIONS: Tuple[Dict[str, Any], ...] = (
     {
         "question": "Which planet is known as the Red Planet?",
         "options": ["Earth", "Mars", "Jupiter", "Venus"],
@@ -260,9 +337,9 @@ TRIVIA_QUESTIONS: List[Dict[str, Any]] = [
         "options": ["Gold", "Oxygen", "Osmium", "Zinc"],
         "answer_index": 1,
     },
-]
+)
 
-ESTIMATION_PROMPTS: List[Dict[str, Any]] = [
+ESTIMATION_PROMPTS: Tuple[Dict[str, Any], ...] = (
     {"prompt": "Number of bones in the adult human body", "target": 206},
     {"prompt": "Minutes in a day", "target": 1440},
     {"prompt": "Number of keys on a standard piano", "target": 88},
@@ -271,9 +348,9 @@ ESTIMATION_PROMPTS: List[Dict[str, Any]] = [
     {"prompt": "Number of UN member countries", "target": 193},
     {"prompt": "Height of Mount Everest in meters", "target": 8848},
     {"prompt": "Players on the field for one soccer team", "target": 11},
-]
+)
 
-JEOPARDY_CATEGORIES: List[Dict[str, Any]] = [
+JEOPARDY_CATEGORIES: Tuple[Dict[str, Any], ...] = (
     {
         "category": "Space",
         "clues": [
@@ -324,9 +401,9 @@ JEOPARDY_CATEGORIES: List[Dict[str, Any]] = [
             {"question": "Sport with rackets and a net, played in sets.", "answer": "Tennis"},
         ],
     },
-]
+)
 
-HOTSEAT_PROMPTS: List[str] = [
+HOTSEAT_PROMPTS: Tuple[str, ...] = (
     "Hot seat: What's your most controversial food opinion?",
     "Hot seat: What's a movie everyone loves that you don't?",
     "Hot seat: What's your most embarrassing habit?",
@@ -342,9 +419,9 @@ HOTSEAT_PROMPTS: List[str] = [
     "Hot seat: What's a game you secretly love?",
     "Hot seat: What's your worst travel story?",
     "Hot seat: What's something you pretend to like?",
-]
+)
 
-QUICKDRAW_PROMPTS: List[str] = [
+QUICKDRAW_PROMPTS: Tuple[str, ...] = (
     "Name a snack you'd bring on a road trip.",
     "One-word answer: a superpower you'd pick.",
     "Name something you'd buy if you won $50 today.",
@@ -365,9 +442,9 @@ QUICKDRAW_PROMPTS: List[str] = [
     "One-word answer: a word that sounds funny.",
     "Name a small luxury.",
     "One-word answer: a party theme.",
-]
+)
 
-SPECTRUM_PROMPTS: List[str] = [
+SPECTRUM_PROMPTS: Tuple[str, ...] = (
     "Cold <-> Hot",
     "Worst <-> Best",
     "Disgusting <-> Delicious",
@@ -383,9 +460,9 @@ SPECTRUM_PROMPTS: List[str] = [
     "Awkward <-> Smooth",
     "Tiny <-> Huge",
     "Clumsy <-> Graceful",
-]
+)
 
-VOTEBATTLE_PROMPTS: List[str] = [
+VOTEBATTLE_PROMPTS: Tuple[str, ...] = (
     "Best excuse for being late.",
     "Worst pickup line.",
     "Most dramatic way to say hello.",
@@ -406,51 +483,72 @@ VOTEBATTLE_PROMPTS: List[str] = [
     "What would you rename the internet?",
     "The most honest fortune cookie message.",
     "The worst thing to put on a bumper sticker.",
-]
+)
 
-SPYFALL_LOCATIONS: List[Dict[str, Any]] = [
+SPYFALL_LOCATIONS: Tuple[Dict[str, Any], ...] = (
     {
         "location": "Space Station",
-        "roles": ["Commander", "Engineer", "Pilot", "Scientist", "Medic", "Tourist"],
+        "roles": ("Commander", "Engineer", "Pilot", "Scientist", "Medic", "Tourist"),
     },
     {
         "location": "Movie Theater",
-        "roles": ["Usher", "Projectionist", "Film Critic", "Snacker", "Director", "Ticket Taker"],
+        "roles": ("Usher", "Projectionist", "Film Critic", "Snacker", "Director", "Ticket Taker"),
     },
     {
         "location": "Cruise Ship",
-        "roles": ["Captain", "Chef", "Entertainer", "Navigator", "Lifeguard", "Passenger"],
+        "roles": ("Captain", "Chef", "Entertainer", "Navigator", "Lifeguard", "Passenger"),
     },
     {
         "location": "Hospital",
-        "roles": ["Doctor", "Nurse", "Surgeon", "Patient", "Pharmacist", "Receptionist"],
+        "roles": ("Doctor", "Nurse", "Surgeon", "Patient", "Pharmacist", "Receptionist"),
     },
     {
         "location": "Museum",
-        "roles": ["Curator", "Guard", "Artist", "Visitor", "Restorer", "Guide"],
+        "roles": ("Curator", "Guard", "Artist", "Visitor", "Restorer", "Guide"),
     },
     {
         "location": "Wild West Town",
-        "roles": ["Sheriff", "Outlaw", "Bartender", "Blacksmith", "Mayor", "Cowhand"],
+        "roles": ("Sheriff", "Outlaw", "Bartender", "Blacksmith", "Mayor", "Cowhand"),
     },
     {
         "location": "Beach",
-        "roles": ["Lifeguard", "Surfer", "Vendor", "Tourist", "Photographer", "Camper"],
+        "roles": ("Lifeguard", "Surfer", "Vendor", "Tourist", "Photographer", "Camper"),
     },
     {
         "location": "Luxury Hotel",
-        "roles": ["Concierge", "Chef", "Guest", "Manager", "Housekeeper", "Bellhop"],
+        "roles": ("Concierge", "Chef", "Guest", "Manager", "Housekeeper", "Bellhop"),
     },
     {
         "location": "Carnival",
-        "roles": ["Ringmaster", "Magician", "Ride Operator", "Clown", "Vendor", "Visitor"],
+        "roles": ("Ringmaster", "Magician", "Ride Operator", "Clown", "Vendor", "Visitor"),
     },
     {
         "location": "High School",
-        "roles": ["Teacher", "Principal", "Student", "Coach", "Nurse", "Janitor"],
+        "roles": ("Teacher", "Principal", "Student", "Coach", "Nurse", "Janitor"),
     },
-]
+)
+
+SPYFALL_DEFAULT_ROLES: Tuple[str, ...] = ("Local", "Worker", "Visitor", "Manager", "Regular", "Rookie")
+SPYFALL_LOCATION_ROLES: Dict[str, Tuple[str, ...]] = {
+    str(entry.get("location", "")).strip().lower(): tuple(
+        str(role) for role in entry.get("roles") or () if str(role).strip()
+    )
+    for entry in SPYFALL_LOCATIONS
+}
+
+
+def freeze_prompts(prompts: Any) -> Tuple[str, ...]:
+    return tuple(sys.intern(str(prompt)) for prompt in prompts)
+
+
+MLT_PROMPTS = freeze_prompts(MLT_PROMPTS)
+HOTSEAT_PROMPTS = freeze_prompts(HOTSEAT_PROMPTS)
+QUICKDRAW_PROMPTS = freeze_prompts(QUICKDRAW_PROMPTS)
+SPECTRUM_PROMPTS = freeze_prompts(SPECTRUM_PROMPTS)
+VOTEBATTLE_PROMPTS = freeze_prompts(VOTEBATTLE_PROMPTS)
 
+# Per-player data is already column-shaped: "players", "scores" and "teams" are parallel maps
+# keyed by pid, so scoring and leaderboards read the one column they need.
 STATE: Dict[str, Any] = {
     "players": {},
     "scores": {},
@@ -557,8 +655,7 @@ STATE: Dict[str, Any] = {
     "auto_advance": True,
     "late_submit_policy": "lock_after_timer",
     "round_start_ts": None,
-    "timer_start_ts": None,
-    "timer_duration": None,
+    "timer_deadline_ns": None,
     "timer_expired": False,
     "wyr_points_majority": False,
     "quickdraw_scoring": "unique",
@@ -583,9 +680,321 @@ STATE: Dict[str, Any] = {
 }
 
 STATE_LOCK = threading.Lock()
+STATE_CHANGED = threading.Condition(STATE_LOCK)
+SSE_STREAM_SLOTS = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+STATE_VERSION = 0
+# STATE_VERSION restarts at zero with the process, so validators and event ids carry a per-boot
+# prefix; a tag or Last-Event-ID from before a restart then never matches the new state.
+BOOT_ID = secrets.token_hex(4)
+SNAPSHOT_CACHE: Tuple[int, Optional[Dict[str, Any]]] = (-1, None)
+STATE_JSON_CACHE: Dict[str, Tuple[str, bytes]] = {}
 
 HOST_KEY = secrets.token_urlsafe(8)
 
+BASE_CSS = """
+:root {
+  --bg: #0f1022;
+  --bg-2: #1a1133;
+  --card: #191c2b;
+  --card-2: #222636;
+  --accent: #ff7a59;
+  --accent-2: #36d6c2;
+  --text: #f8f5ff;
+  --muted: #b9c4d6;
+  --border: #2a2f44;
+  --good: #32d488;
+  --bad: #ff6b6b;
+}
+* { box-sizing: border-box; }
+body {
+  margin: 0;
+  color: var(--text);
+  background: radial-gradient(1200px 600px at 10% -10%, #2a1b4b 0%, #0f1022 60%);
+  font-family: "Trebuchet MS", "Verdana", sans-serif;
+}
+body.player {
+  --card: #ffffff;
+  --card-2: #fff6ec;
+  --text: #1b1a23;
+  --muted: #4c5868;
+  --border: #e3d9cf;
+  --accent: #ff7a59;
+  --accent-2: #36b1d6;
+  background: radial-gradient(1000px 600px at 20% -10%, #fff2d7 0%, #ffd7bd 60%);
+}
+body.host { font-size: 18px; }
+.wrap {
+  max-width: 1020px;
+  margin: 0 auto;
+  padding: 24px;
+}
+.card {
+  background: var(--card);
+  border: 1px solid var(--border);
+  border-radius: 18px;
+  padding: 20px;
+  margin-bottom: 16px;
+  box-shadow: 0 18px 34px rgba(0, 0, 0, 0.18);
+}
+body.host .card { box-shadow: none; }
+.hero { padding: 26px; }
+h1, h2, h3 { margin: 0 0 12px 0; }
+.title { font-size: 2.2rem; font-weight: 800; }
+.subtitle { font-size: 1.05rem; }
+.muted { color: var(--muted); }
+.row { display: flex; gap: 16px; flex-wrap: wrap; align-items: center; }
+.space-between { justify-content: space-between; }
+.stack { display: grid; gap: 12px; }
+.grid-2 { display: grid; gap: 16px; }
+.grid-3 { display: grid; gap: 16px; }
+@media (min-width: 920px) {
+  .grid-2 { grid-template-columns: 1fr 1fr; }
+  .grid-3 { grid-template-columns: 1fr 1fr 1fr; }
+}
+.btn {
+  display: inline-flex;
+  justify-content: center;
+  align-items: center;
+  gap: 8px;
+  background: var(--accent);
+  color: #ffffff;
+  border: none;
+  padding: 14px 18px;
+  border-radius: 14px;
+  font-size: 1rem;
+  font-weight: 800;
+  cursor: pointer;
+  text-decoration: none;
+  transition: transform 0.08s ease, box-shadow 0.08s ease;
+  box-shadow: 0 10px 20px rgba(0, 0, 0, 0.18);
+}
+body.host .btn { font-size: 1.08rem; padding: 16px 20px; }
+.btn:hover { transform: translateY(-1px); }
+.btn.secondary { background: var(--accent-2); }
+.btn.ghost {
+  background: transparent;
+  color: var(--accent);
+  border: 2px solid var(--accent);
+  box-shadow: none;
+}
+.btn.full { width: 100%; }
+.input {
+  width: 100%;
+  padding: 12px 14px;
+  border: 1px solid var(--border);
+  border-radius: 12px;
+  font-size: 1rem;
+  background: var(--card-2);
+  color: inherit;
+}
+.chip {
+  display: inline-flex;
+  padding: 6px 10px;
+  border-radius: 999px;
+  background: rgba(255, 255, 255, 0.12);
+  font-weight: 700;
+  font-size: 0.85rem;
+}
+body.player .chip { background: rgba(0, 0, 0, 0.08); }
+.pill {
+  display: inline-flex;
+  padding: 6px 12px;
+  border-radius: 999px;
+  background: var(--accent);
+  color: #fff;
+  font-weight: 700;
+  font-size: 0.85rem;
+}
+.pill.good { background: var(--good); }
+.pill.bad { background: var(--bad); }
+.alert {
+  padding: 10px 12px;
+  border-radius: 12px;
+  background: rgba(255, 122, 89, 0.18);
+  color: inherit;
+  margin-bottom: 10px;
+  border: 1px solid rgba(255, 122, 89, 0.4);
+}
+.timer {
+  font-size: 1.4rem;
+  font-weight: 800;
+  padding: 6px 12px;
+  border-radius: 12px;
+  background: rgba(54, 214, 194, 0.2);
+}
+.code-box {
+  font-size: 2rem;
+  font-weight: 900;
+  letter-spacing: 0.2rem;
+  padding: 12px 16px;
+  border-radius: 16px;
+  background: var(--card-2);
+  border: 1px dashed var(--border);
+  display: inline-block;
+}
+.progress {
+  width: 100%;
+  height: 12px;
+  background: rgba(255, 255, 255, 0.08);
+  border-radius: 999px;
+  overflow: hidden;
+}
+body.player .progress { background: rgba(0, 0, 0, 0.08); }
+.progress-fill {
+  height: 100%;
+  background: linear-gradient(90deg, var(--accent), var(--accent-2));
+  width: 0%;
+}
+.list {
+  display: grid;
+  gap: 10px;
+}
+.list-item {
+  display: flex;
+  justify-content: space-between;
+  align-items: center;
+  padding: 10px 12px;
+  border-radius: 12px;
+  background: var(--card-2);
+  border: 1px solid var(--border);
+}
+.right { text-align: right; }
+img { max-width: 240px; height: auto; }
+"""
+
+# Served minified; BASE_CSS has no descendant pseudo-class selectors, so " :" never needs its space.
+PARTY_CSS = re.sub(r"\s+", " ", re.sub(r"\s*([{};:,>])\s*", r"\1", BASE_CSS)).replace(";}", "}").strip()
+CSS_VERSION = hashlib.sha1(PARTY_CSS.encode("utf-8")).hexdigest()[:10]
+
+PLAY_JS = """
+(function () {
+  const wrap = document.querySelector(".wrap");
+  const config = document.currentScript.dataset;
+  const initial = {};
+  let refreshing = false;
+  let draftDirty = true;
+  function readInitial(data) {
+    initial.phase = data.phase;
+    initial.mode = data.mode;
+    initial.roundId = Number(data.roundId);
+    initial.votebattle = data.votebattle;
+    initial.spyfall = data.spyfall;
+    initial.mafia = data.mafia;
+    initial.triviaBuzzer = data.triviaBuzzer;
+  }
+  function isTextInput(el) {
+    if (!el) { return false; }
+    if (el.tagName === "TEXTAREA") { return true; }
+    if (el.tagName !== "INPUT") { return false; }
+    const type = (el.getAttribute("type") || "text").toLowerCase();
+    return type === "text" || type === "search";
+  }
+  function hasFocusedInput() {
+    return isTextInput(document.activeElement);
+  }
+  function hasDraftText() {
+    if (!draftDirty) { return false; }
+    const fields = document.querySelectorAll("textarea, input[type='text'], input[type='search']");
+    for (let i = 0; i < fields.length; i += 1) {
+      if ((fields[i].value || "").trim() !== "") {
+        return true;
+      }
+    }
+    draftDirty = false;
+    return false;
+  }
+  async function refresh() {
+    refreshing = true;
+    try {
+      const url = new URL(window.location.href);
+      url.searchParams.set("fragment", "1");
+      const res = await fetch(url, { cache: "no-store", credentials: "same-origin" });
+      if (!res.ok || res.redirected || !wrap) {
+        window.location.reload();
+        return;
+      }
+      wrap.innerHTML = await res.text();
+      draftDirty = false;
+      const next = wrap.querySelector("script[data-phase]");
+      if (next) { readInitial(next.dataset); }
+    } catch (err) {
+      window.location.reload();
+    } finally {
+      refreshing = false;
+    }
+  }
+  let latest = null;
+  let recheckTimer = null;
+  function check(data) {
+    latest = data;
+    const changed = (
+      data.phase !== initial.phase ||
+      data.mode !== initial.mode ||
+      data.round_id !== initial.roundId ||
+      (data.votebattle_phase || "") !== initial.votebattle ||
+      (data.spyfall_phase || "") !== initial.spyfall ||
+      (data.mafia_phase || "") !== initial.mafia ||
+      (data.trivia_buzzer_phase || "") !== initial.triviaBuzzer
+    );
+    if (!changed || refreshing) { return; }
+    if (!hasFocusedInput() && !hasDraftText()) {
+      refresh();
+    } else if (recheckTimer === null) {
+      // The stream only sends again on the next change, so look back once the player is done typing.
+      recheckTimer = setTimeout(function () {
+        recheckTimer = null;
+        check(latest);
+      }, Number(config.pollMs));
+    }
+  }
+  let pollMs = Number(config.pollMs);
+  let lastState = "";
+  async function poll() {
+    try {
+      const res = await fetch(config.stateUrl, { cache: "no-cache" });
+      if (res.ok) {
+        const text = await res.text();
+        if (text === lastState) {
+          pollMs = Math.min(pollMs * 1.5, Number(config.pollMaxMs));
+        } else {
+          lastState = text;
+          pollMs = Number(config.pollMs);
+        }
+        check(JSON.parse(text));
+      }
+    } catch (err) {
+      pollMs = Number(config.pollMs);
+    }
+    setTimeout(poll, pollMs);
+  }
+  readInitial(config);
+  document.addEventListener("input", function (event) {
+    if (isTextInput(event.target)) { draftDirty = true; }
+  });
+  if (window.EventSource) {
+    const source = new EventSource(config.eventsUrl);
+    let current = {};
+    source.onmessage = function (event) {
+      try {
+        current = Object.assign({}, current, JSON.parse(event.data));
+        check(current);
+      } catch (err) {
+        return;
+      }
+    };
+    source.onerror = function () {
+      // The server answers 204 when every stream slot is taken, which closes the source for good.
+      if (source.readyState === EventSource.CLOSED) { setTimeout(poll, pollMs); }
+    };
+  } else {
+    setTimeout(poll, pollMs);
+  }
+})();
+"""
+
+PLAY_JS_VERSION = hashlib.sha1(PLAY_JS.encode("utf-8")).hexdigest()[:10]
+ASSET_CACHE_SECONDS = 60 * 60 * 24 * 365
+
 BASE_TEMPLATE = """
 <!doctype html>
 <html lang="en">
@@ -593,176 +1002,7 @@ BASE_TEMPLATE = """
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
     <title>{{ title }}</title>
-    <style>
-      :root {
-        --bg: #0f1022;
-        --bg-2: #1a1133;
-        --card: #191c2b;
-        --card-2: #222636;
-        --accent: #ff7a59;
-        --accent-2: #36d6c2;
-        --text: #f8f5ff;
-        --muted: #b9c4d6;
-        --border: #2a2f44;
-        --good: #32d488;
-        --bad: #ff6b6b;
-      }
-      * { box-sizing: border-box; }
-      body {
-        margin: 0;
-        color: var(--text);
-        background: radial-gradient(1200px 600px at 10% -10%, #2a1b4b 0%, #0f1022 60%);
-        font-family: "Trebuchet MS", "Verdana", sans-serif;
-      }
-      body.player {
-        --card: #ffffff;
-        --card-2: #fff6ec;
-        --text: #1b1a23;
-        --muted: #4c5868;
-        --border: #e3d9cf;
-        --accent: #ff7a59;
-        --accent-2: #36b1d6;
-        background: radial-gradient(1000px 600px at 20% -10%, #fff2d7 0%, #ffd7bd 60%);
-      }
-      body.host { font-size: 18px; }
-      .wrap {
-        max-width: 1020px;
-        margin: 0 auto;
-        padding: 24px;
-      }
-      .card {
-        background: var(--card);
-        border: 1px solid var(--border);
-        border-radius: 18px;
-        padding: 20px;
-        margin-bottom: 16px;
-        box-shadow: 0 18px 34px rgba(0, 0, 0, 0.18);
-      }
-      body.host .card { box-shadow: none; }
-      .hero { padding: 26px; }
-      h1, h2, h3 { margin: 0 0 12px 0; }
-      .title { font-size: 2.2rem; font-weight: 800; }
-      .subtitle { font-size: 1.05rem; }
-      .muted { color: var(--muted); }
-      .row { display: flex; gap: 16px; flex-wrap: wrap; align-items: center; }
-      .space-between { justify-content: space-between; }
-      .stack { display: grid; gap: 12px; }
-      .grid-2 { display: grid; gap: 16px; }
-      .grid-3 { display: grid; gap: 16px; }
-      @media (min-width: 920px) {
-        .grid-2 { grid-template-columns: 1fr 1fr; }
-        .grid-3 { grid-template-columns: 1fr 1fr 1fr; }
-      }
-      .btn {
-        display: inline-flex;
-        justify-content: center;
-        align-items: center;
-        gap: 8px;
-        background: var(--accent);
-        color: #ffffff;
-        border: none;
-        padding: 14px 18px;
-        border-radius: 14px;
-        font-size: 1rem;
-        font-weight: 800;
-        cursor: pointer;
-        text-decoration: none;
-        transition: transform 0.08s ease, box-shadow 0.08s ease;
-        box-shadow: 0 10px 20px rgba(0, 0, 0, 0.18);
-      }
-      body.host .btn { font-size: 1.08rem; padding: 16px 20px; }
-      .btn:hover { transform: translateY(-1px); }
-      .btn.secondary { background: var(--accent-2); }
-      .btn.ghost {
-        background: transparent;
-        color: var(--accent);
-        border: 2px solid var(--accent);
-        box-shadow: none;
-      }
-      .btn.full { width: 100%; }
-      .input {
-        width: 100%;
-        padding: 12px 14px;
-        border: 1px solid var(--border);
-        border-radius: 12px;
-        font-size: 1rem;
-        background: var(--card-2);
-        color: inherit;
-      }
-      .chip {
-        display: inline-flex;
-        padding: 6px 10px;
-        border-radius: 999px;
-        background: rgba(255, 255, 255, 0.12);
-        font-weight: 700;
-        font-size: 0.85rem;
-      }
-      body.player .chip { background: rgba(0, 0, 0, 0.08); }
-      .pill {
-        display: inline-flex;
-        padding: 6px 12px;
-        border-radius: 999px;
-        background: var(--accent);
-        color: #fff;
-        font-weight: 700;
-        font-size: 0.85rem;
-      }
-      .pill.good { background: var(--good); }
-      .pill.bad { background: var(--bad); }
-      .alert {
-        padding: 10px 12px;
-        border-radius: 12px;
-        background: rgba(255, 122, 89, 0.18);
-        color: inherit;
-        margin-bottom: 10px;
-        border: 1px solid rgba(255, 122, 89, 0.4);
-      }
-      .timer {
-        font-size: 1.4rem;
-        font-weight: 800;
-        padding: 6px 12px;
-        border-radius: 12px;
-        background: rgba(54, 214, 194, 0.2);
-      }
-      .code-box {
-        font-size: 2rem;
-        font-weight: 900;
-        letter-spacing: 0.2rem;
-        padding: 12px 16px;
-        border-radius: 16px;
-        background: var(--card-2);
-        border: 1px dashed var(--border);
-        display: inline-block;
-      }
-      .progress {
-        width: 100%;
-        height: 12px;
-        background: rgba(255, 255, 255, 0.08);
-        border-radius: 999px;
-        overflow: hidden;
-      }
-      body.player .progress { background: rgba(0, 0, 0, 0.08); }
-      .progress-fill {
-        height: 100%;
-        background: linear-gradient(90deg, var(--accent), var(--accent-2));
-        width: 0%;
-      }
-      .list {
-        display: grid;
-        gap: 10px;
-      }
-      .list-item {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        padding: 10px 12px;
-        border-radius: 12px;
-        background: var(--card-2);
-        border: 1px solid var(--border);
-      }
-      .right { text-align: right; }
-      img { max-width: 240px; height: auto; }
-    </style>
+    <link rel="stylesheet" href="{{ urls.party_css }}">
   </head>
   <body class="{{ body_class }}">
     <div class="wrap">
@@ -779,7 +1019,7 @@ JOIN_BODY = """
   {% if error %}
   <div class="alert">{{ error }}</div>
   {% endif %}
-  <form method="post" action="{{ url_for('join') }}" class="stack">
+  <form method="post" action="{{ urls.join }}" class="stack">
     <label class="muted">Display name</label>
     <input class="input" type="text" name="name" maxlength="{{ name_max_len }}" placeholder="Display name" required>
     <label class="muted">Lobby code</label>
@@ -803,13 +1043,13 @@ NAME_CONFLICT_BODY = """
   <div class="title">Name already taken</div>
   <p class="muted">Someone is already using "{{ name }}". Pick an option below.</p>
   <div class="stack">
-    <form method="post" action="{{ url_for('join') }}">
+    <form method="post" action="{{ urls.join }}">
       <input type="hidden" name="name" value="{{ name }}">
       <input type="hidden" name="lobby_code" value="{{ lobby_code }}">
       <input type="hidden" name="conflict_action" value="join_suffix">
       <button class="btn full" type="submit">Join as {{ suggested_name }}</button>
     </form>
-    <form method="post" action="{{ url_for('join') }}">
+    <form method="post" action="{{ urls.join }}">
       <input type="hidden" name="name" value="{{ name }}">
       <input type="hidden" name="lobby_code" value="{{ lobby_code }}">
       <input type="hidden" name="conflict_action" value="reclaim">
@@ -826,7 +1066,8 @@ RECLAIM_WAIT_BODY = """
   <div class="pill">Stay on this page</div>
 </div>
 <script>
-  setTimeout(function () { window.location.reload(); }, 2500);
+  // Approval only changes this player's record, which the public event stream never carries.
+  setTimeout(function () { window.location.reload(); }, {{ poll_ms }});
 </script>
 """
 
@@ -894,15 +1135,9 @@ PLAY_BODY = """
       {% endif %}
       {% if spyfall_phase == "vote" %}
         {% if not submitted %}
-          <form method="post" action="{{ url_for('submit') }}" class="stack">
+          <form method="post" action="{{ urls.submit }}" class="stack">
             <input type="hidden" name="round_id" value="{{ round_id }}">
-            {% for p in player_choices %}
-              {% if p.pid == pid %}
-                <button class="btn ghost full" type="button" disabled>Your name</button>
-              {% else %}
-                <button class="btn full" type="submit" name="vote" value="{{ p.pid }}">{{ p.name }}</button>
-              {% endif %}
-            {% endfor %}
+            {{ choice_buttons(player_choices, "vote", pid, "Your name") }}
           </form>
         {% else %}
           <p class="muted">Vote received. Waiting for others.</p>
@@ -928,30 +1163,18 @@ PLAY_BODY = """
       {% if mafia_phase == "night" %}
         {% if mafia_role == "werewolf" and mafia_alive %}
           {% if not submitted %}
-            <form method="post" action="{{ url_for('submit') }}" class="stack">
+            <form method="post" action="{{ urls.submit }}" class="stack">
               <input type="hidden" name="round_id" value="{{ round_id }}">
-              {% for p in alive_choices %}
-                {% if p.pid == pid %}
-                  <button class="btn ghost full" type="button" disabled>You</button>
-                {% else %}
-                  <button class="btn full" type="submit" name="wolf_target" value="{{ p.pid }}">{{ p.name }}</button>
-                {% endif %}
-              {% endfor %}
+              {{ choice_buttons(alive_choices, "wolf_target", pid, "You") }}
             </form>
           {% else %}
             <p class="muted">Target locked. Waiting for dawn...</p>
           {% endif %}
         {% elif mafia_role == "seer" and mafia_alive %}
           {% if not submitted %}
-            <form method="post" action="{{ url_for('submit') }}" class="stack">
+            <form method="post" action="{{ urls.submit }}" class="stack">
               <input type="hidden" name="round_id" value="{{ round_id }}">
-              {% for p in alive_choices %}
-                {% if p.pid == pid %}
-                  <button class="btn ghost full" type="button" disabled>You</button>
-                {% else %}
-                  <button class="btn full" type="submit" name="seer_target" value="{{ p.pid }}">Inspect {{ p.name }}</button>
-                {% endif %}
-              {% endfor %}
+              {{ choice_buttons(alive_choices, "seer_target", pid, "You", "Inspect ") }}
             </form>
           {% else %}
             <p class="muted">Inspection sent. Waiting for dawn...</p>
@@ -964,11 +1187,9 @@ PLAY_BODY = """
           <p class="muted">Last eliminated: {{ mafia_last_eliminated }}</p>
         {% endif %}
         {% if mafia_alive and not submitted %}
-          <form method="post" action="{{ url_for('submit') }}" class="stack">
+          <form method="post" action="{{ urls.submit }}" class="stack">
             <input type="hidden" name="round_id" value="{{ round_id }}">
-            {% for p in alive_choices %}
-              <button class="btn full" type="submit" name="vote" value="{{ p.pid }}">{{ p.name }}</button>
-            {% endfor %}
+            {{ choice_buttons(alive_choices, "vote") }}
           </form>
         {% else %}
           <p class="muted">Waiting for the village vote...</p>
@@ -990,7 +1211,7 @@ PLAY_BODY = """
         {% if buzz_winner_name %}
           <p class="muted">Waiting for the host to open answers.</p>
         {% elif can_buzz %}
-          <form method="post" action="{{ url_for('submit') }}" class="stack">
+          <form method="post" action="{{ urls.submit }}" class="stack">
             <input type="hidden" name="round_id" value="{{ round_id }}">
             <button class="btn full" type="submit" name="buzz" value="1">BUZZ</button>
           </form>
@@ -1002,7 +1223,7 @@ PLAY_BODY = """
           <div class="pill good">Answer locked</div>
           <p class="muted">Waiting for the host.</p>
         {% elif can_answer %}
-          <form method="post" action="{{ url_for('submit') }}" class="stack">
+          <form method="post" action="{{ urls.submit }}" class="stack">
             <input type="hidden" name="round_id" value="{{ round_id }}">
             {% for opt in options %}
               <button class="btn full" type="submit" name="choice" value="{{ loop.index0 }}">
@@ -1018,7 +1239,7 @@ PLAY_BODY = """
           <div class="pill good">Steal submitted</div>
           <p class="muted">Waiting for the host.</p>
         {% elif can_steal %}
-          <form method="post" action="{{ url_for('submit') }}" class="stack">
+          <form method="post" action="{{ urls.submit }}" class="stack">
             <input type="hidden" name="round_id" value="{{ round_id }}">
             {% for opt in options %}
               <button class="btn full" type="submit" name="choice" value="{{ loop.index0 }}">
@@ -1037,12 +1258,10 @@ PLAY_BODY = """
   {% else %}
     <div class="card">
       {% if not submitted %}
-        <form method="post" action="{{ url_for('submit') }}" class="stack">
+        <form method="post" action="{{ urls.submit }}" class="stack">
           <input type="hidden" name="round_id" value="{{ round_id }}">
           {% if mode == "mlt" %}
-            {% for p in player_choices %}
-              <button class="btn full" type="submit" name="vote" value="{{ p.pid }}">{{ p.name }}</button>
-            {% endfor %}
+            {{ choice_buttons(player_choices, "vote") }}
           {% elif mode == "wyr" %}
             <button class="btn full" type="submit" name="choice" value="0">A: {{ options[0] }}</button>
             <button class="btn secondary full" type="submit" name="choice" value="1">B: {{ options[1] }}</button>
@@ -1095,9 +1314,7 @@ PLAY_BODY = """
         <p class="muted">No votes were submitted.</p>
       {% endif %}
       <div class="list">
-        {% for row in results.tally_rows %}
-          <div class="list-item"><span>{{ row.name }}</span><span class="pill">{{ row.votes }}</span></div>
-        {% endfor %}
+        {{ results.tally_html }}
       </div>
     {% elif results and results.mode == "wyr" %}
       <div class="list">
@@ -1112,9 +1329,7 @@ PLAY_BODY = """
     {% elif results and results.mode == "trivia" %}
       <p class="muted">Correct answer: {{ results.correct_text }}</p>
       <div class="list">
-        {% for row in results.option_rows %}
-          <div class="list-item"><span>{{ row.label }}</span><span class="pill">{{ row.votes }}</span></div>
-        {% endfor %}
+        {{ results.option_html }}
       </div>
     {% elif results and results.mode in ("trivia_buzzer", "team_trivia") %}
       {% if results.buzz_name %}
@@ -1181,18 +1396,14 @@ PLAY_BODY = """
       </div>
       <p class="muted">Location: {{ results.location }}</p>
       <div class="list">
-        {% for row in results.tally_rows %}
-          <div class="list-item"><span>{{ row.name }}</span><span class="pill">{{ row.votes }}</span></div>
-        {% endfor %}
+        {{ results.tally_html }}
       </div>
     {% elif results and results.mode == "mafia" %}
       <div class="pill {{ 'good' if results.winner == 'villagers' else 'bad' }}">
         Winner: {{ results.winner or "unknown" }}
       </div>
       <div class="list">
-        {% for row in results.roles %}
-          <div class="list-item"><span>{{ row.name }}</span><span class="pill">{{ row.role }}</span></div>
-        {% endfor %}
+        {{ results.roles_html }}
       </div>
     {% endif %}
   </div>
@@ -1223,60 +1434,19 @@ PLAY_BODY = """
   {% endif %}
 {% endif %}
 
-<script>
-  (function () {
-    const initial = {
-      phase: "{{ public_phase }}",
-      mode: "{{ public_mode }}",
-      roundId: {{ public_round_id }},
-      votebattle: "{{ public_votebattle_phase or '' }}",
-      spyfall: "{{ public_spyfall_phase or '' }}",
-      mafia: "{{ public_mafia_phase or '' }}",
-      triviaBuzzer: "{{ public_trivia_buzzer_phase or '' }}"
-    };
-    function isTextInput(el) {
-      if (!el) { return false; }
-      if (el.tagName === "TEXTAREA") { return true; }
-      if (el.tagName !== "INPUT") { return false; }
-      const type = (el.getAttribute("type") || "text").toLowerCase();
-      return type === "text" || type === "search";
-    }
-    function hasFocusedInput() {
-      return isTextInput(document.activeElement);
-    }
-    function hasDraftText() {
-      const fields = document.querySelectorAll("textarea, input[type='text'], input[type='search']");
-      for (let i = 0; i < fields.length; i += 1) {
-        if ((fields[i].value || "").trim() !== "") {
-          return true;
-        }
-      }
-      return false;
-    }
-    async function poll() {
-      try {
-        const res = await fetch("{{ url_for('api_public_state') }}", { cache: "no-store" });
-        if (!res.ok) { return; }
-        const data = await res.json();
-        const changed = (
-          data.phase !== initial.phase ||
-          data.mode !== initial.mode ||
-          data.round_id !== initial.roundId ||
-          (data.votebattle_phase || "") !== initial.votebattle ||
-          (data.spyfall_phase || "") !== initial.spyfall ||
-          (data.mafia_phase || "") !== initial.mafia ||
-          (data.trivia_buzzer_phase || "") !== initial.triviaBuzzer
-        );
-        if (changed && !hasFocusedInput() && !hasDraftText()) {
-          window.location.reload();
-        }
-      } catch (err) {
-        return;
-      }
-    }
-    setInterval(poll, {{ public_poll_ms }});
-  })();
-</script>
+<script
+  src="{{ urls.play_js }}"
+  data-phase="{{ public_phase }}"
+  data-mode="{{ public_mode }}"
+  data-round-id="{{ public_round_id }}"
+  data-votebattle="{{ public_votebattle_phase or '' }}"
+  data-spyfall="{{ public_spyfall_phase or '' }}"
+  data-mafia="{{ public_mafia_phase or '' }}"
+  data-trivia-buzzer="{{ public_trivia_buzzer_phase or '' }}"
+  data-poll-ms="{{ public_poll_ms }}"
+  data-poll-max-ms="{{ public_poll_max_ms }}"
+  data-state-url="{{ urls.api_public_state }}"
+  data-events-url="{{ urls.api_events }}"></script>
 """
 
 HOST_BODY = """
@@ -1320,9 +1490,9 @@ HOST_BODY = """
       </div>
     </div>
     <p class="muted">Host URL (localhost): <span class="chip">{{ host_url }}</span></p>
-    {% if join_qr_data %}
+    {% if join_qr %}
       <div style="margin-top:12px;">
-        <img src="{{ join_qr_data }}" alt="Join QR">
+        <img src="{{ join_qr[0] }}" alt="Join QR" width="{{ join_qr[1] }}" height="{{ join_qr[1] }}" style="image-rendering:pixelated;">
       </div>
     {% endif %}
   </div>
@@ -1364,18 +1534,16 @@ HOST_BODY = """
 <div class="grid-2">
   <div class="card">
     <h2>Game Hub</h2>
-    <form method="post" action="{{ url_for('host_action') }}" class="stack">
+    <form method="post" action="{{ urls.host_action }}" class="stack">
       <input type="hidden" name="action" value="set_mode">
       <label class="muted" for="mode">Mode</label>
       <select class="input" name="mode" id="mode">
-        {% for key, label in mode_labels.items() %}
-          <option value="{{ key }}" {% if key == mode %}selected{% endif %}>{{ label }}</option>
-        {% endfor %}
+        {{ mode_options }}
       </select>
       <button class="btn ghost full" type="submit">Set Mode</button>
     </form>
 
-    <form method="post" action="{{ url_for('host_action') }}" class="stack" style="margin-top:12px;">
+    <form method="post" action="{{ urls.host_action }}" class="stack" style="margin-top:12px;">
       <button class="btn full" name="action" value="start_round" type="submit">Start Round</button>
       {% if show_progress_button %}
       <button class="btn secondary full" name="action" value="progress" type="submit" id="progress-btn">{{ progress_label }}</button>
@@ -1395,7 +1563,7 @@ HOST_BODY = """
   {% if show_prompt_control %}
   <div class="card">
     <h2>Prompt Control</h2>
-    <form method="post" action="{{ url_for('host_action') }}" class="stack">
+    <form method="post" action="{{ urls.host_action }}" class="stack">
       <input type="hidden" name="action" value="apply_prompt_settings">
       <label class="muted" for="prompt_mode">Prompt Mode</label>
       <select class="input" name="prompt_mode" id="prompt_mode">
@@ -1433,7 +1601,7 @@ HOST_BODY = """
       {% endif %}
       <button class="btn ghost full" type="submit">Apply Prompt Settings</button>
     </form>
-    <form method="post" action="{{ url_for('host_action') }}" style="margin-top:12px;">
+    <form method="post" action="{{ urls.host_action }}" style="margin-top:12px;">
       <input type="hidden" name="action" value="pick_random_prompt">
       <button class="btn full" type="submit">Pick Random Now</button>
     </form>
@@ -1445,7 +1613,7 @@ HOST_BODY = """
   <div class="card">
     <h2>Game Settings</h2>
     {% if show_game_settings_wyr %}
-    <form method="post" action="{{ url_for('host_action') }}" style="margin-top:12px;">
+    <form method="post" action="{{ urls.host_action }}" style="margin-top:12px;">
       <input type="hidden" name="action" value="set_wyr_points">
       <label>
         <input type="checkbox" name="points_majority" {% if wyr_points_majority %}checked{% endif %}>
@@ -1455,7 +1623,7 @@ HOST_BODY = """
     </form>
     {% endif %}
     {% if show_game_settings_quickdraw %}
-    <form method="post" action="{{ url_for('host_action') }}" style="margin-top:12px;">
+    <form method="post" action="{{ urls.host_action }}" style="margin-top:12px;">
       <input type="hidden" name="action" value="set_quickdraw_scoring">
       <label class="muted">Quick Draw scoring</label>
       <label>
@@ -1475,7 +1643,7 @@ HOST_BODY = """
   {% if show_game_settings_buzzer %}
   <div class="card">
     <h2>Buzzer Settings</h2>
-    <form method="post" action="{{ url_for('host_action') }}" class="stack">
+    <form method="post" action="{{ urls.host_action }}" class="stack">
       <input type="hidden" name="action" value="set_trivia_buzzer_settings">
       <label>
         <input type="checkbox" name="steal_enabled" {% if trivia_buzzer_steal_enabled %}checked{% endif %}>
@@ -1489,7 +1657,7 @@ HOST_BODY = """
   {% if show_game_settings_spyfall %}
   <div class="card">
     <h2>Spyfall Settings</h2>
-    <form method="post" action="{{ url_for('host_action') }}" class="stack">
+    <form method="post" action="{{ urls.host_action }}" class="stack">
       <input type="hidden" name="action" value="set_spyfall_settings">
       <label>
         <input type="checkbox" name="auto_start_vote_on_timer" {% if spyfall_auto_start_vote_on_timer %}checked{% endif %}>
@@ -1507,7 +1675,7 @@ HOST_BODY = """
   {% if show_game_settings_mafia %}
   <div class="card">
     <h2>Mafia/Werewolf Settings</h2>
-    <form method="post" action="{{ url_for('host_action') }}" class="stack">
+    <form method="post" action="{{ urls.host_action }}" class="stack">
       <input type="hidden" name="action" value="set_mafia_settings">
       <label>
         <input type="checkbox" name="seer_enabled" {% if mafia_seer_enabled %}checked{% endif %}>
@@ -1534,7 +1702,7 @@ HOST_BODY = """
 <div class="grid-2">
   <div class="card">
     <h2>Timer + Lobby</h2>
-    <form method="post" action="{{ url_for('host_action') }}" class="stack">
+    <form method="post" action="{{ urls.host_action }}" class="stack">
       <input type="hidden" name="action" value="set_timer_settings">
       <label>
         <input type="checkbox" name="timer_enabled" {% if timer_enabled %}checked{% endif %}>
@@ -1555,19 +1723,19 @@ HOST_BODY = """
       </select>
       <button class="btn ghost full" type="submit">Save Timer Settings</button>
     </form>
-    <form method="post" action="{{ url_for('host_action') }}" style="margin-top:12px;">
+    <form method="post" action="{{ urls.host_action }}" style="margin-top:12px;">
       <input type="hidden" name="action" value="toggle_lobby_lock">
       <button class="btn ghost full" type="submit">
         {% if lobby_locked %}Unlock Lobby{% else %}Lock Lobby{% endif %}
       </button>
     </form>
-    <form method="post" action="{{ url_for('host_action') }}" style="margin-top:12px;">
+    <form method="post" action="{{ urls.host_action }}" style="margin-top:12px;">
       <input type="hidden" name="action" value="toggle_allow_renames">
       <button class="btn ghost full" type="submit">
         {% if allow_renames %}Disable Renames{% else %}Enable Renames{% endif %}
       </button>
     </form>
-    <form method="post" action="{{ url_for('host_action') }}" style="margin-top:12px;">
+    <form method="post" action="{{ urls.host_action }}" style="margin-top:12px;">
       <input type="hidden" name="action" value="toggle_lobby_code">
       <button class="btn ghost full" type="submit">
         {% if require_lobby_code %}Disable Lobby Code{% else %}Require Lobby Code{% endif %}
@@ -1577,7 +1745,7 @@ HOST_BODY = """
 
   <div class="card">
     <h2>Teams</h2>
-    <form method="post" action="{{ url_for('host_action') }}" class="stack">
+    <form method="post" action="{{ urls.host_action }}" class="stack">
       <input type="hidden" name="action" value="set_teams">
       <label>
         <input type="checkbox" name="teams_enabled" {% if teams_enabled %}checked{% endif %}>
@@ -1585,13 +1753,13 @@ HOST_BODY = """
       </label>
       <label class="muted">Team count (2-4)</label>
       <input class="input" type="number" name="team_count" min="2" max="4" value="{{ team_count }}">
-      {% for team_id in range(1, team_count + 1) %}
+      {% for team_id, team_name in team_name_rows %}
         <label class="muted">Team {{ team_id }} name</label>
-        <input class="input" type="text" name="team_name_{{ team_id }}" value="{{ team_names.get(team_id, 'Team ' ~ team_id) }}">
+        <input class="input" type="text" name="team_name_{{ team_id }}" value="{{ team_name }}">
       {% endfor %}
       <button class="btn ghost full" type="submit">Save Teams</button>
     </form>
-    <form method="post" action="{{ url_for('host_action') }}" style="margin-top:12px;">
+    <form method="post" action="{{ urls.host_action }}" style="margin-top:12px;">
       <input type="hidden" name="action" value="randomize_teams">
       <button class="btn secondary full" type="submit">Randomize Teams</button>
     </form>
@@ -1601,7 +1769,7 @@ HOST_BODY = """
 <div class="grid-2">
   <div class="card">
     <h2>Safety Filter</h2>
-    <form method="post" action="{{ url_for('host_action') }}" class="stack">
+    <form method="post" action="{{ urls.host_action }}" class="stack">
       <input type="hidden" name="action" value="set_filter_mode">
       <label class="muted">Profanity filter</label>
       <select class="input" name="filter_mode">
@@ -1627,7 +1795,7 @@ HOST_BODY = """
         {% for p in players %}
           <div class="list-item">
             <span>{{ p.name }}{% if p.team %} ({{ p.team }}){% endif %}</span>
-            <form method="post" action="{{ url_for('host_action') }}">
+            <form method="post" action="{{ urls.host_action }}">
               <input type="hidden" name="action" value="kick">
               <input type="hidden" name="pid" value="{{ p.pid }}">
               <button class="btn ghost" type="submit">Kick</button>
@@ -1635,7 +1803,7 @@ HOST_BODY = """
           </div>
         {% endfor %}
       </div>
-      <form method="post" action="{{ url_for('host_action') }}" style="margin-top:12px;">
+      <form method="post" action="{{ urls.host_action }}" style="margin-top:12px;">
         <button class="btn ghost full" name="action" value="kick_all" type="submit">Kick All Players</button>
       </form>
     {% else %}
@@ -1679,12 +1847,12 @@ HOST_BODY = """
       <div class="list-item">
         <span>{{ req.name }}</span>
         <div class="row">
-          <form method="post" action="{{ url_for('host_action') }}">
+          <form method="post" action="{{ urls.host_action }}">
             <input type="hidden" name="action" value="approve_reclaim">
             <input type="hidden" name="request_id" value="{{ req.request_id }}">
             <button class="btn secondary" type="submit">Approve</button>
           </form>
-          <form method="post" action="{{ url_for('host_action') }}">
+          <form method="post" action="{{ urls.host_action }}">
             <input type="hidden" name="action" value="deny_reclaim">
             <input type="hidden" name="request_id" value="{{ req.request_id }}">
             <button class="btn ghost" type="submit">Deny</button>
@@ -1706,9 +1874,7 @@ HOST_BODY = """
       <p class="muted">No votes were submitted.</p>
     {% endif %}
     <div class="list">
-      {% for row in results.tally_rows %}
-        <div class="list-item"><span>{{ row.name }}</span><span class="pill">{{ row.votes }}</span></div>
-      {% endfor %}
+      {{ results.tally_html }}
     </div>
   {% elif results.mode == "wyr" %}
     <div class="list">
@@ -1723,9 +1889,7 @@ HOST_BODY = """
   {% elif results.mode == "trivia" %}
     <p class="muted">Correct answer: {{ results.correct_text }}</p>
     <div class="list">
-      {% for row in results.option_rows %}
-        <div class="list-item"><span>{{ row.label }}</span><span class="pill">{{ row.votes }}</span></div>
-      {% endfor %}
+      {{ results.option_html }}
     </div>
   {% elif results.mode in ("trivia_buzzer", "team_trivia") %}
     {% if results.buzz_name %}
@@ -1755,7 +1919,7 @@ HOST_BODY = """
       {% for row in results.answers %}
         <div class="list-item">
           <span>{{ row.name }}: {{ row.answer }}</span>
-          <form method="post" action="{{ url_for('host_action') }}">
+          <form method="post" action="{{ urls.host_action }}">
             <input type="hidden" name="action" value="award_point">
             <input type="hidden" name="pid" value="{{ row.pid }}">
             <button class="btn ghost" type="submit">Award</button>
@@ -1775,7 +1939,7 @@ HOST_BODY = """
         {% for row in results.entries %}
           <div class="list-item">
             <span>{{ row.name }}: {{ row.answer }}</span>
-            <form method="post" action="{{ url_for('host_action') }}">
+            <form method="post" action="{{ urls.host_action }}">
               <input type="hidden" name="action" value="award_quickdraw">
               <input type="hidden" name="pid" value="{{ row.pid }}">
               <button class="btn ghost" type="submit">Award</button>
@@ -1809,16 +1973,12 @@ HOST_BODY = """
     <div class="pill {{ 'good' if results.spy_caught else 'bad' }}">Spy {{ "caught" if results.spy_caught else "escaped" }}: {{ results.spy_name }}</div>
     <p class="muted">Location: {{ results.location }}</p>
     <div class="list">
-      {% for row in results.tally_rows %}
-        <div class="list-item"><span>{{ row.name }}</span><span class="pill">{{ row.votes }}</span></div>
-      {% endfor %}
+      {{ results.tally_html }}
     </div>
   {% elif results.mode == "mafia" %}
     <div class="pill {{ 'good' if results.winner == 'villagers' else 'bad' }}">Winner: {{ results.winner or "unknown" }}</div>
     <div class="list">
-      {% for row in results.roles %}
-        <div class="list-item"><span>{{ row.name }}</span><span class="pill">{{ row.role }}</span></div>
-      {% endfor %}
+      {{ results.roles_html }}
     </div>
   {% endif %}
 </div>
@@ -1828,7 +1988,8 @@ HOST_BODY = """
 <div class="card">
   <h2>AI Prompt Generation</h2>
   <p class="muted">Generates new prompt pools. Existing rounds are unchanged.</p>
-  <form method="post" action="{{ url_for('host_action') }}" class="stack">
+  <form method="post" action="{{ urls.host_action }}" class="stack">
+    <button class="btn full" name="action" value="generate_all" type="submit">Generate All Prompt Pools</button>
     <button class="btn ghost full" name="action" value="generate_mlt" type="submit">Generate MLT Prompts</button>
     <button class="btn ghost full" name="action" value="generate_wyr" type="submit">Generate WYR Prompts</button>
     <button class="btn ghost full" name="action" value="generate_trivia" type="submit">Generate Trivia Questions</button>
@@ -1859,72 +2020,86 @@ HOST_BODY = """
   }
 
   (function () {
+    function apply(data) {
+      const playerCount = document.getElementById("player-count");
+      const submissionCount = document.getElementById("submission-count");
+      const submissionTarget = document.getElementById("submission-target");
+      const modeLabel = document.getElementById("mode-label");
+      const phaseLabel = document.getElementById("phase-label");
+      const roundId = document.getElementById("round-id");
+      const promptText = document.getElementById("prompt-text");
+      const progressFill = document.getElementById("progress-fill");
+      const votebattlePhase = document.getElementById("votebattle-phase");
+      const votebattleSubmitCount = document.getElementById("votebattle-submit-count");
+      const votebattleVoteCount = document.getElementById("votebattle-vote-count");
+      const submissionNames = document.getElementById("submission-names");
+      const spyfallPhase = document.getElementById("spyfall-phase");
+      const mafiaPhase = document.getElementById("mafia-phase");
+      const wavelengthTarget = document.getElementById("wavelength-target");
+      const triviaBuzzerPhase = document.getElementById("trivia-buzzer-phase");
+      const buzzWinner = document.getElementById("buzz-winner");
+      const answerBy = document.getElementById("answer-by");
+      const progressBtn = document.getElementById("progress-btn");
+      if (playerCount) { playerCount.textContent = data.player_count; }
+      if (submissionCount) { submissionCount.textContent = data.submission_count; }
+      if (submissionTarget) { submissionTarget.textContent = data.submission_target; }
+      if (modeLabel) { modeLabel.textContent = data.mode_label || data.mode; }
+      if (phaseLabel) { phaseLabel.textContent = data.phase_label || data.phase; }
+      if (roundId) { roundId.textContent = data.round_id; }
+      if (promptText) { promptText.textContent = data.prompt || "None"; }
+      if (progressFill) { progressFill.style.width = data.progress_percent + "%"; }
+      if (wavelengthTarget && data.wavelength_target !== null && data.wavelength_target !== undefined) {
+        wavelengthTarget.textContent = data.wavelength_target;
+      }
+      if (votebattlePhase) { votebattlePhase.textContent = data.votebattle_phase || "submit"; }
+      if (votebattleSubmitCount) { votebattleSubmitCount.textContent = data.votebattle_submit_count || 0; }
+      if (votebattleVoteCount) { votebattleVoteCount.textContent = data.votebattle_vote_count || 0; }
+      if (spyfallPhase) { spyfallPhase.textContent = data.spyfall_phase || "question"; }
+      if (mafiaPhase) { mafiaPhase.textContent = data.mafia_phase || "night"; }
+      if (triviaBuzzerPhase) { triviaBuzzerPhase.textContent = data.trivia_buzzer_phase || "buzz"; }
+      if (buzzWinner) { buzzWinner.textContent = data.buzz_winner_display || "--"; }
+      if (answerBy) { answerBy.textContent = data.answer_display || "--"; }
+      if (submissionNames && Array.isArray(data.submission_names)) {
+        submissionNames.textContent = data.submission_names.length ? data.submission_names.join(", ") : "No submissions yet.";
+      }
+      if (progressBtn) {
+        if (data.show_progress_button) {
+          progressBtn.style.display = "";
+          progressBtn.textContent = data.progress_label || "Progress";
+        } else {
+          progressBtn.style.display = "none";
+        }
+      }
+    }
     async function poll() {
       try {
-        const res = await fetch("{{ url_for('api_state') }}", { cache: "no-store" });
+        const res = await fetch("{{ urls.api_state }}", { cache: "no-cache" });
         if (!res.ok) { return; }
-        const data = await res.json();
-        const playerCount = document.getElementById("player-count");
-        const submissionCount = document.getElementById("submission-count");
-        const submissionTarget = document.getElementById("submission-target");
-        const modeLabel = document.getElementById("mode-label");
-        const phaseLabel = document.getElementById("phase-label");
-        const roundId = document.getElementById("round-id");
-        const promptText = document.getElementById("prompt-text");
-        const progressFill = document.getElementById("progress-fill");
-        const votebattlePhase = document.getElementById("votebattle-phase");
-        const votebattleSubmitCount = document.getElementById("votebattle-submit-count");
-        const votebattleVoteCount = document.getElementById("votebattle-vote-count");
-        const submissionNames = document.getElementById("submission-names");
-        const spyfallPhase = document.getElementById("spyfall-phase");
-        const mafiaPhase = document.getElementById("mafia-phase");
-        const wavelengthTarget = document.getElementById("wavelength-target");
-        const triviaBuzzerPhase = document.getElementById("trivia-buzzer-phase");
-        const buzzWinner = document.getElementById("buzz-winner");
-        const answerBy = document.getElementById("answer-by");
-        const progressBtn = document.getElementById("progress-btn");
-        if (playerCount) { playerCount.textContent = data.player_count; }
-        if (submissionCount) { submissionCount.textContent = data.submission_count; }
-        if (submissionTarget) { submissionTarget.textContent = data.submission_target; }
-        if (modeLabel) { modeLabel.textContent = data.mode_label || data.mode; }
-        if (phaseLabel) { phaseLabel.textContent = data.phase_label || data.phase; }
-        if (roundId) { roundId.textContent = data.round_id; }
-        if (promptText) { promptText.textContent = data.prompt || "None"; }
-        if (progressFill) { progressFill.style.width = data.progress_percent + "%"; }
-        if (wavelengthTarget && data.wavelength_target !== null && data.wavelength_target !== undefined) {
-          wavelengthTarget.textContent = data.wavelength_target;
-        }
-        if (votebattlePhase) { votebattlePhase.textContent = data.votebattle_phase || "submit"; }
-        if (votebattleSubmitCount) { votebattleSubmitCount.textContent = data.votebattle_submit_count || 0; }
-        if (votebattleVoteCount) { votebattleVoteCount.textContent = data.votebattle_vote_count || 0; }
-        if (spyfallPhase) { spyfallPhase.textContent = data.spyfall_phase || "question"; }
-        if (mafiaPhase) { mafiaPhase.textContent = data.mafia_phase || "night"; }
-        if (triviaBuzzerPhase) { triviaBuzzerPhase.textContent = data.trivia_buzzer_phase || "buzz"; }
-        if (buzzWinner) { buzzWinner.textContent = data.buzz_winner_display || "--"; }
-        if (answerBy) { answerBy.textContent = data.answer_display || "--"; }
-        if (submissionNames && Array.isArray(data.submission_names)) {
-          submissionNames.textContent = data.submission_names.length ? data.submission_names.join(", ") : "No submissions yet.";
-        }
-        if (progressBtn) {
-          if (data.show_progress_button) {
-            progressBtn.style.display = "";
-            progressBtn.textContent = data.progress_label || "Progress";
-          } else {
-            progressBtn.style.display = "none";
-          }
-        }
+        apply(await res.json());
       } catch (err) {
         return;
       }
     }
-    poll();
-    setInterval(poll, {{ host_poll_ms }});
-  })();
-
-  (function () {
+    {% if timer_enabled %}
+    let timerDeadline = null;
+    function renderTimer() {
+      const timer = document.getElementById("timer-badge");
+      if (timer && timerDeadline !== null) {
+        timer.textContent = Math.max(0, Math.ceil((timerDeadline - Date.now()) / 1000)) + "s";
+      }
+    }
+    function applyTimer(data) {
+      const lockBadge = document.getElementById("lock-badge");
+      if (lockBadge) {
+        lockBadge.textContent = data.submissions_locked ? "Locked" : "Open";
+      }
+      const seconds = data.timer_remaining;
+      timerDeadline = seconds === null || seconds === undefined ? null : Date.now() + seconds * 1000;
+      renderTimer();
+    }
     async function pollTimer() {
       try {
-        const res = await fetch("{{ url_for('api_host_timer') }}", { cache: "no-store" });
+        const res = await fetch("{{ urls.api_host_timer }}", { cache: "no-cache" });
         if (!res.ok) { return; }
         const data = await res.json();
         const timer = document.getElementById("timer-badge");
@@ -1939,10 +2114,37 @@ HOST_BODY = """
         return;
       }
     }
-    {% if timer_enabled %}
+    {% endif %}
+    function startPolling() {
+      poll();
+      setInterval(poll, {{ host_poll_ms }});
+      {% if timer_enabled %}
+      timerDeadline = null;
       pollTimer();
       setInterval(pollTimer, {{ host_timer_poll_ms }});
-    {% endif %}
+      {% endif %}
+    }
+    if (window.EventSource) {
+      const source = new EventSource("{{ urls.api_host_events }}");
+      let current = {};
+      source.onmessage = function (event) {
+        try {
+          const data = Object.assign({}, current, JSON.parse(event.data));
+          current = data;
+          apply(data);
+          {% if timer_enabled %}applyTimer(data);{% endif %}
+        } catch (err) {
+          return;
+        }
+      };
+      source.onerror = function () {
+        // The server answers 204 when every stream slot is taken, which closes the source for good.
+        if (source.readyState === EventSource.CLOSED) { startPolling(); }
+      };
+      {% if timer_enabled %}setInterval(renderTimer, 1000);{% endif %}
+    } else {
+      startPolling();
+    }
   })();
 </script>
 """
@@ -1955,18 +2157,219 @@ HOST_LOCKED_BODY = """
 </div>
 """
 
-def render_page(body: str, *, title: str, body_class: str, **context: Any) -> str:
-    template = BASE_TEMPLATE.replace("__BODY__", body)
-    return render_template_string(template, title=title, body_class=body_class, **context)
+PAGE_TEMPLATES: Dict[str, Any] = {}
+PAGE_FRAGMENTS: Dict[str, Any] = {}
+PAGE_URL_ENDPOINTS = (
+    "index",
+    "play",
+    "host",
+    "reclaim_wait",
+    "join",
+    "submit",
+    "host_action",
+    "api_events",
+    "api_host_events",
+    "api_public_state",
+    "api_state",
+    "api_host_timer",
+)
+PAGE_URLS: Dict[str, Dict[str, str]] = {}
+
+
+def get_page_urls() -> Dict[str, str]:
+    urls = PAGE_URLS.get(request.script_root)
+    if urls is None:
+        urls = {endpoint: url_for(endpoint) for endpoint in PAGE_URL_ENDPOINTS}
+        urls["party_css"] = url_for("party_css", v=CSS_VERSION)
+        urls["play_js"] = url_for("play_js", v=PLAY_JS_VERSION)
+        PAGE_URLS[request.script_root] = urls
+    return urls
+
+
+SNAPSHOT_VIEWS: Dict[Any, Tuple[Optional[Dict[str, Any]], Any]] = {}
+
+
+def get_snapshot_view(snapshot: Dict[str, Any], key: Any, build: Callable[[], Any]) -> Any:
+    # Snapshots are shared per STATE_VERSION, so one derived view serves every client until the next change.
+    cached_snapshot, view = SNAPSHOT_VIEWS.get(key, (None, None))
+    if cached_snapshot is snapshot:
+        return view
+    view = build()
+    SNAPSHOT_VIEWS[key] = (snapshot, view)
+    return view
+
+
+def result_rows_html(rows: List[Dict[str, Any]], label_key: str, value_key: str) -> Any:
+    return Markup(
+        "".join(
+            f'<div class="list-item"><span>{escape(row[label_key])}</span>'
+            f'<span class="pill">{escape(row[value_key])}</span></div>'
+            for row in rows
+        )
+    )
+
+
+def get_results_view(snapshot: Dict[str, Any], reveal_authors: bool) -> Optional[Dict[str, Any]]:
+    def build() -> Optional[Dict[str, Any]]:
+        view = build_results_view(snapshot, reveal_authors=reveal_authors)
+        if view is not None:
+            view["tally_html"] = result_rows_html(view.get("tally_rows", []), "name", "votes")
+            view["option_html"] = result_rows_html(view.get("option_rows", []), "label", "votes")
+            view["roles_html"] = result_rows_html(view.get("roles", []), "name", "role")
+        return view
+
+    return get_snapshot_view(snapshot, ("results", reveal_authors), build)
+
+
+def get_team_name_rows(snapshot: Dict[str, Any]) -> List[Tuple[int, str]]:
+    def build() -> List[Tuple[int, str]]:
+        names = snapshot.get("team_names", {})
+        count = snapshot.get("team_count", 2)
+        return [(team_id, names.get(team_id, f"Team {team_id}")) for team_id in range(1, count + 1)]
+
+    return get_snapshot_view(snapshot, "team_name_rows", build)
+
+
+SCOREBOARD_KEYS = ("players", "scores", "teams_enabled", "team_count", "team_names", "teams")
+LAST_SCOREBOARDS: List[Any] = [None, None]
+
+
+def get_snapshot_scoreboards(snapshot: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    def build() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        # Most version bumps (submissions, phase changes) leave scores alone; a dict compare
+        # against the previous snapshot's inputs is cheaper than re-sorting the lobby.
+        inputs = tuple(snapshot.get(key) for key in SCOREBOARD_KEYS)
+        last_inputs, boards = LAST_SCOREBOARDS
+        if boards is None or inputs != last_inputs:
+            boards = (
+                get_scoreboard(snapshot.get("players", {}), snapshot.get("scores", {})),
+                get_team_scoreboard(snapshot),
+            )
+            LAST_SCOREBOARDS[:] = [inputs, boards]
+        return boards
+
+    return get_snapshot_view(snapshot, "scoreboards", build)
+
+
+@functools.lru_cache(maxsize=None)
+def mode_options_html(selected: str) -> Any:
+    return Markup(
+        "".join(
+            f'<option value="{escape(key)}"{" selected" if key == selected else ""}>{escape(label)}</option>'
+            for key, label in MODE_LABELS.items()
+        )
+    )
+
+
+def choice_buttons(
+    choices: List[Dict[str, Any]], field: str, pid: Optional[str] = None, self_label: str = "", prefix: str = ""
+) -> Any:
+    rows = []
+    for choice in choices:
+        if pid is not None and choice["pid"] == pid:
+            rows.append(f'<button class="btn ghost full" type="button" disabled>{self_label}</button>')
+        else:
+            rows.append(
+                f'<button class="btn full" type="submit" name="{field}" value="{escape(choice["pid"])}">'
+                f'{prefix}{escape(choice["name"])}</button>'
+            )
+    return Markup("\n".join(rows))
+
+
+TEMPLATE_INDENT_RE = re.compile(r"\s*\n\s*")
+
 
+def minify_template(source: str) -> str:
+    # Templates have no <pre> or multi-line <textarea>, so indentation is never significant.
+    return TEMPLATE_INDENT_RE.sub("\n", source).strip()
 
+
+def compile_page_template(env: Any, body: str, fragment: bool) -> Any:
+    source = body if fragment else BASE_TEMPLATE.replace("__BODY__", body)
+    template = env.from_string(minify_template(source))
+    (PAGE_FRAGMENTS if fragment else PAGE_TEMPLATES)[body] = template
+    return template
+
+
+def compile_page_templates(app: Flask) -> None:
+    app.config["TEMPLATES_AUTO_RELOAD"] = False
+    app.jinja_env.auto_reload = False
+    app.jinja_env.trim_blocks = True
+    app.jinja_env.lstrip_blocks = True
+    app.jinja_env.globals["choice_buttons"] = choice_buttons
+    for body in (JOIN_BODY, NAME_CONFLICT_BODY, RECLAIM_WAIT_BODY, PLAY_BODY, HOST_BODY, HOST_LOCKED_BODY):
+        compile_page_template(app.jinja_env, body, fragment=False)
+        compile_page_template(app.jinja_env, body, fragment=True)
+
+
+JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def json_dumps(payload: Any, pretty: bool = False) -> bytes:
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(payload, option=option)
+    if pretty:
+        return json.dumps(payload, indent=2).encode("utf-8")
+    return JSON_ENCODER.encode(payload).encode("utf-8")
+
+
+def json_response(payload: Any, status: int = 200, etag: Optional[str] = None) -> Any:
+    if etag is not None and etag in request.if_none_match:
+        resp = current_app.response_class(status=304)
+    else:
+        body = payload if isinstance(payload, bytes) else json_dumps(payload)
+        resp = current_app.response_class(body, status=status, mimetype="application/json")
+    if etag is not None:
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+def render_page(body: str, *, title: str, body_class: str, fragment: bool = False, **context: Any) -> str:
+    template = (PAGE_FRAGMENTS if fragment else PAGE_TEMPLATES).get(body)
+    if template is None:
+        template = compile_page_template(current_app.jinja_env, body, fragment)
+    context["title"] = title
+    context["body_class"] = body_class
+    context["urls"] = get_page_urls()
+    current_app.update_template_context(context)
+    return template.render(context)
+
+
+RENDERED_PAGES: Dict[Tuple[Any, ...], str] = {}
+# Bodies that never change (the fixed-context pages and the CSS/JS assets) are gzipped once;
+# compress_response looks a body up here before compressing it per request.
+STATIC_GZIP: Dict[bytes, bytes] = {}
+
+
+def cache_static_gzip(text: str) -> None:
+    data = text.encode("utf-8")
+    if len(data) >= GZIP_MIN_BYTES:
+        STATIC_GZIP[data] = gzip.compress(data, compresslevel=9)
+
+
+cache_static_gzip(PARTY_CSS)
+cache_static_gzip(PLAY_JS)
+
+
+def render_static_page(body: str, *, title: str, body_class: str, **context: Any) -> str:
+    # Only for pages whose context is fixed (no user input): the rendered HTML is reused as-is.
+    key = (body, title, body_class, request.script_root, tuple(sorted(context.items())))
+    html = RENDERED_PAGES.get(key)
+    if html is None:
+        html = render_page(body, title=title, body_class=body_class, **context)
+        RENDERED_PAGES[key] = html
+        cache_static_gzip(html)
+    return html
+
+
+@functools.lru_cache(maxsize=1)
 def get_lan_ip() -> str:
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.connect(("8.8.8.8", 80))
-        ip = sock.getsockname()[0]
-        sock.close()
-        return ip
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect(("8.8.8.8", 80))
+            return sock.getsockname()[0]
     except Exception:
         try:
             return socket.gethostbyname(socket.gethostname())
@@ -1974,15 +2377,14 @@ def get_lan_ip() -> str:
             return "127.0.0.1"
 
 
+LOCAL_ADDRS = frozenset(("127.0.0.1", "::1", "::ffff:127.0.0.1"))
+
+
 def is_local_request() -> bool:
-    addr = request.remote_addr or ""
-    if addr in ("127.0.0.1", "::1"):
-        return True
-    if addr.startswith("::ffff:127.0.0.1"):
-        return True
-    return False
+    return request.remote_addr in LOCAL_ADDRS
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_text(text: str) -> str:
     cleaned = " ".join(text.strip().lower().split())
     for prefix in ("a ", "an ", "the "):
@@ -1992,12 +2394,16 @@ def normalize_text(text: str) -> str:
     return cleaned
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_lobby_code(code: str) -> str:
     return "".join(ch for ch in code.upper() if ch.isalnum())
 
 
 def make_lobby_code(length: int = JOIN_CODE_LENGTH) -> str:
-    return "".join(secrets.choice(LOBBY_CODE_CHARS) for _ in range(length))
+    code = b""
+    while len(code) < length:
+        code += secrets.token_bytes(length * 2).translate(LOBBY_CODE_TABLE, LOBBY_CODE_REJECT)
+    return code[:length].decode("ascii")
 
 
 def validate_lobby_code(input_code: str, expected_code: str, required: bool) -> bool:
@@ -2009,15 +2415,13 @@ def validate_lobby_code(input_code: str, expected_code: str, required: bool) ->
 
 
 def contains_banned_word(text: str, mode: str) -> bool:
-    if mode == "off":
-        return False
-    words = re.findall(r"[a-zA-Z]+", text.lower())
-    banned = BANNED_WORDS_STRICT if mode == "strict" else BANNED_WORDS_MILD
-    return any(word in banned for word in words)
+    pattern = BANNED_PATTERNS.get(mode, BANNED_PATTERNS["mild"])
+    return pattern is not None and pattern.search(text) is not None
 
 
 def clean_text_answer(text: str, limit: int = TEXT_MAX_LEN) -> str:
-    cleaned = " ".join(text.split())
+    # Only the first `limit` words can reach the clipped result.
+    cleaned = " ".join(text.split(None, limit))
     return cleaned[:limit].strip()
 
 
@@ -2035,18 +2439,43 @@ def check_text_allowed(text: str, state: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-def build_qr_data_url(data: str) -> Optional[str]:
+TEXT_SUBMISSION_FIELDS = {
+    "votebattle": ("votebattle_text", VOTEBATTLE_MAX_LEN),
+    "hotseat": ("text_answer", TEXT_MAX_LEN),
+    "quickdraw": ("text_answer", QUICKDRAW_MAX_LEN),
+}
+
+
+def prefetch_moderation(text: str) -> None:
+    # The OpenAI round-trip runs before STATE_LOCK is taken, so concurrent submitters overlap;
+    # check_text_allowed then reads the cached verdict under the lock.
+    if not text:
+        return
+    with STATE_LOCK:
+        enabled = STATE.get("openai_moderation_enabled")
+        filter_mode = STATE.get("filter_mode", "mild")
+    if not enabled or contains_banned_word(text, filter_mode):
+        return
+    openai_moderate_text(text)
+
+
+@functools.lru_cache(maxsize=8)
+def build_qr_data_url(data: str) -> Optional[Tuple[str, int]]:
     if not HAS_QR:
         return None
     try:
-        qr = qrcode.QRCode(border=1, box_size=4)
+        # One pixel per module; the page scales it up with image-rendering: pixelated, by a whole
+        # number of pixels per module so every module is drawn the same width.
+        qr = qrcode.QRCode(border=1, box_size=1)
         qr.add_data(data)
         qr.make(fit=True)
         img = qr.make_image(fill_color="black", back_color="white")
         buffer = io.BytesIO()
         img.save(buffer, format="PNG")
-        encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
-        return f"data:image/png;base64,{encoded}"
+        with buffer.getbuffer() as png:
+            encoded = base64.b64encode(png).decode("ascii")
+        modules = qr.modules_count + 2 * qr.border
+        return f"data:image/png;base64,{encoded}", modules * max(1, round(QR_DISPLAY_PX / modules))
     except Exception:
         return None
 
@@ -2075,6 +2504,9 @@ def get_active_submission_count(state: Dict[str, Any]) -> int:
     return len(state.get("submissions", {}))
 
 
+UNKNOWN_PLAYER = types.MappingProxyType({"name": "Unknown"})
+
+
 def get_active_submission_names(state: Dict[str, Any]) -> List[str]:
     players = state.get("players", {})
     mode = state.get("mode")
@@ -2097,46 +2529,28 @@ def get_active_submission_names(state: Dict[str, Any]) -> List[str]:
             pids = []
     elif mode == "mafia":
         if state.get("mafia_phase") == "night":
-            pids = list(state.get("mafia_wolf_votes", {}).keys()) + list(state.get("mafia_seer_results", {}).keys())
+            pids = itertools.chain(state.get("mafia_wolf_votes", {}), state.get("mafia_seer_results", {}))
         elif state.get("mafia_phase") == "day":
             pids = state.get("mafia_day_votes", {}).keys()
         else:
             pids = []
     else:
         pids = state.get("submissions", {}).keys()
-    names = [players.get(pid, {}).get("name", "Unknown") for pid in pids]
-    names.sort(key=lambda name: name.lower())
+    names = [players.get(pid, UNKNOWN_PLAYER).get("name", "Unknown") for pid in pids]
+    names.sort(key=str.lower)
     return names
 
 
-def unique_answer_pids(submissions: Dict[str, Any]) -> List[str]:
-    normalized_map: Dict[str, List[str]] = {}
-    for pid, answer in submissions.items():
-        normalized = normalize_text(str(answer))
-        if not normalized:
-            continue
-        normalized_map.setdefault(normalized, []).append(pid)
-    unique = []
-    for pids in normalized_map.values():
-        if len(pids) == 1:
-            unique.append(pids[0])
-    return unique
-
-
-def build_tally(submissions: Dict[str, Any], valid_pids: List[str]) -> Dict[str, int]:
-    tally = {pid: 0 for pid in valid_pids}
-    for vote in submissions.values():
-        if vote in tally:
-            tally[vote] += 1
-    return tally
+def build_tally(submissions: Dict[str, Any], valid_keys: Iterable[Any]) -> Dict[Any, int]:
+    counts = Counter(submissions.values())
+    return {key: counts[key] for key in valid_keys}
 
 
-def pick_winners_from_tally(tally: Dict[str, int]) -> Tuple[List[str], int]:
-    if not tally:
-        return [], 0
-    max_votes = max(tally.values())
-    winners = [pid for pid, votes in tally.items() if votes == max_votes and votes > 0]
-    return winners, max_votes
+def pick_winners_from_tally(tally: Dict[Any, int]) -> Tuple[List[Any], int]:
+    max_votes = max(tally.values(), default=0)
+    if max_votes <= 0:
+        return [], max_votes
+    return [pid for pid, votes in tally.items() if votes == max_votes], max_votes
 
 
 def get_submission_target_count(state: Dict[str, Any]) -> int:
@@ -2187,83 +2601,88 @@ def build_votebattle_choices(state: Dict[str, Any], pid: str) -> List[Dict[str,
 
 
 def openai_ready() -> bool:
-    if not os.environ.get("OPENAI_API_KEY"):
-        return False
-    try:
-        import openai  # type: ignore
+    return OPENAI_READY
 
-        _ = openai
-    except Exception:
-        return False
-    return True
+
+@functools.lru_cache(maxsize=1)
+def get_openai_client(api_key: str) -> Any:
+    # One client per key keeps the SDK's HTTP connection pool warm between calls.
+    return openai.OpenAI(api_key=api_key)
+
+
+MODERATION_VERDICTS: Dict[str, bool] = {}
+MODERATION_CACHE_SIZE = 1024
 
 
 def openai_moderate_text(text: str) -> Tuple[Optional[bool], Optional[str]]:
-    api_key = os.environ.get("OPENAI_API_KEY")
+    api_key = OPENAI_API_KEY
     if not api_key:
         return None, "OpenAI moderation not configured."
-    try:
-        import openai  # type: ignore
-    except Exception:
+    verdict = MODERATION_VERDICTS.get(text)
+    if verdict is not None:
+        return verdict, None
+    if not HAS_OPENAI:
         return None, "openai package not installed."
     try:
-        if hasattr(openai, "OpenAI"):
-            client = openai.OpenAI(api_key=api_key)
+        if OPENAI_CLIENT_API:
+            client = get_openai_client(api_key)
             resp = client.moderations.create(model="omni-moderation-latest", input=text)
             flagged = bool(resp.results[0].flagged)
         else:
             openai.api_key = api_key
             resp = openai.Moderation.create(input=text)
             flagged = bool(resp["results"][0]["flagged"])
+        if len(MODERATION_VERDICTS) >= MODERATION_CACHE_SIZE:
+            MODERATION_VERDICTS.clear()
+        MODERATION_VERDICTS[text] = not flagged
         return not flagged, None
     except Exception as exc:
         return None, f"OpenAI moderation failed: {exc}"
 
 
+JSON_BLOCK_RE = re.compile(r"[\[{].*[\]}]", re.S)
+
+
 def parse_json_from_text(text: str) -> Optional[Any]:
-    cleaned = text.strip()
-    if cleaned.startswith("```"):
-        lines = []
-        for line in cleaned.splitlines():
-            if line.strip().startswith("```"):
-                continue
-            lines.append(line)
-        cleaned = "\n".join(lines).strip()
-    starts = [cleaned.find("["), cleaned.find("{")]
-    starts = [idx for idx in starts if idx != -1]
-    if starts:
-        cleaned = cleaned[min(starts) :]
-    end_idx = max(cleaned.rfind("]"), cleaned.rfind("}"))
-    if end_idx != -1:
-        cleaned = cleaned[: end_idx + 1]
+    # First opening bracket to last closing bracket; this also skips any ``` fences around the JSON.
+    match = JSON_BLOCK_RE.search(text)
+    if match is None:
+        return None
     try:
-        return json.loads(cleaned)
+        if HAS_JITER:
+            # Keys such as "question"/"options" repeat per item; jiter reuses one str for each.
+            return jiter.from_json(match.group().encode("utf-8"), cache_mode="keys")
+        return json.loads(match.group())
     except Exception:
         return None
 
 
+# Shared rules live in the system message so every generator sends the same leading text;
+# the per-mode task in the user message is the only part that differs.
+OPENAI_SYSTEM_PROMPT = (
+    "You generate PG-13 party game prompts. Return only valid JSON with no prose or code fences. "
+    "Never include player names."
+)
+
+
 def call_openai(prompt: str) -> Tuple[Optional[str], Optional[str]]:
-    api_key = os.environ.get("OPENAI_API_KEY")
+    api_key = OPENAI_API_KEY
     if not api_key:
         return None, "OPENAI_API_KEY not set."
-    try:
-        import openai  # type: ignore
-    except Exception:
+    if not HAS_OPENAI:
         return None, "openai package not installed."
 
-    model = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+    model = OPENAI_MODEL
+    messages = [
+        {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
     try:
-        if hasattr(openai, "OpenAI"):
-            client = openai.OpenAI(api_key=api_key)
+        if OPENAI_CLIENT_API:
+            client = get_openai_client(api_key)
             resp = client.chat.completions.create(
                 model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You generate PG-13 party game prompts. Return JSON only.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
+                messages=messages,
                 temperature=0.8,
             )
             content = resp.choices[0].message.content
@@ -2271,13 +2690,7 @@ def call_openai(prompt: str) -> Tuple[Optional[str], Optional[str]]:
             openai.api_key = api_key
             resp = openai.ChatCompletion.create(
                 model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You generate PG-13 party game prompts. Return JSON only.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
+                messages=messages,
                 temperature=0.8,
             )
             content = resp["choices"][0]["message"]["content"]
@@ -2285,12 +2698,38 @@ def call_openai(prompt: str) -> Tuple[Optional[str], Optional[str]]:
     except Exception as exc:
         return None, f"OpenAI call failed: {exc}"
 
+
+# Only identical calls that are still in flight are shared (a double-clicked Generate, or a single
+# pool generated while Generate All is running); every finished call is forgotten, so a host who
+# clicks Generate again always gets a fresh set.
+OPENAI_INFLIGHT: Dict[str, concurrent.futures.Future[Tuple[Optional[str], Optional[str]]]] = {}
+OPENAI_INFLIGHT_LOCK = threading.Lock()
+
+
+def shared_call_openai(prompt: str) -> Tuple[Optional[str], Optional[str]]:
+    with OPENAI_INFLIGHT_LOCK:
+        pending = OPENAI_INFLIGHT.get(prompt)
+        if pending is None:
+            future = OPENAI_INFLIGHT[prompt] = concurrent.futures.Future()
+    if pending is not None:
+        return pending.result()
+    try:
+        result = call_openai(prompt)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        with OPENAI_INFLIGHT_LOCK:
+            del OPENAI_INFLIGHT[prompt]
+    future.set_result(result)
+    return result
+
+
 def generate_mlt_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
     prompt = (
-        "Create 20 PG-13 'Most Likely To' prompts. Return a JSON array of strings. "
-        "Do not include player names."
+        "Create 20 'Most Likely To' prompts. Return a JSON array of strings."
     )
-    text, err = call_openai(prompt)
+    text, err = shared_call_openai(prompt)
     if err:
         return None, err
     data = parse_json_from_text(text or "")
@@ -2304,10 +2743,10 @@ def generate_mlt_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
 
 def generate_wyr_prompts() -> Tuple[Optional[List[Dict[str, str]]], Optional[str]]:
     prompt = (
-        "Create 20 PG-13 'Would you rather' questions. Return a JSON array of objects "
-        "with keys 'a' and 'b'. Keep options short. Do not include player names."
+        "Create 20 'Would you rather' questions. Return a JSON array of objects "
+        "with keys 'a' and 'b'. Keep options short."
     )
-    text, err = call_openai(prompt)
+    text, err = shared_call_openai(prompt)
     if err:
         return None, err
     data = parse_json_from_text(text or "")
@@ -2328,11 +2767,10 @@ def generate_wyr_prompts() -> Tuple[Optional[List[Dict[str, str]]], Optional[str
 
 def generate_trivia_questions() -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
     prompt = (
-        "Create 15 PG-13 trivia questions. Return a JSON array of objects with keys "
-        "'question', 'options' (array of 4 strings), and 'answer_index' (0-3). "
-        "Do not include player names."
+        "Create 15 trivia questions. Return a JSON array of objects with keys "
+        "'question', 'options' (array of 4 strings), and 'answer_index' (0-3)."
     )
-    text, err = call_openai(prompt)
+    text, err = shared_call_openai(prompt)
     if err:
         return None, err
     data = parse_json_from_text(text or "")
@@ -2362,10 +2800,9 @@ def generate_trivia_questions() -> Tuple[Optional[List[Dict[str, Any]]], Optiona
 
 def generate_hotseat_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
     prompt = (
-        "Create 20 PG-13 'Hot Seat' prompts. Return a JSON array of strings. "
-        "Avoid player names and keep prompts short."
+        "Create 20 'Hot Seat' prompts. Return a JSON array of strings. Keep prompts short."
     )
-    text, err = call_openai(prompt)
+    text, err = shared_call_openai(prompt)
     if err:
         return None, err
     data = parse_json_from_text(text or "")
@@ -2379,10 +2816,10 @@ def generate_hotseat_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
 
 def generate_quickdraw_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
     prompt = (
-        "Create 25 PG-13 Quick Draw prompts for short, one-line answers. "
-        "Return a JSON array of strings. Keep prompts short and avoid player names."
+        "Create 25 Quick Draw prompts for short, one-line answers. "
+        "Return a JSON array of strings. Keep prompts short."
     )
-    text, err = call_openai(prompt)
+    text, err = shared_call_openai(prompt)
     if err:
         return None, err
     data = parse_json_from_text(text or "")
@@ -2396,10 +2833,10 @@ def generate_quickdraw_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
 
 def generate_wavelength_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
     prompt = (
-        "Create 20 PG-13 spectrum prompts in the form 'X <-> Y'. Return a JSON array of strings. "
-        "Keep them short and avoid player names."
+        "Create 20 spectrum prompts in the form 'X <-> Y'. Return a JSON array of strings. "
+        "Keep them short."
     )
-    text, err = call_openai(prompt)
+    text, err = shared_call_openai(prompt)
     if err:
         return None, err
     data = parse_json_from_text(text or "")
@@ -2413,10 +2850,10 @@ def generate_wavelength_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
 
 def generate_votebattle_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
     prompt = (
-        "Create 20 PG-13 Vote Battle prompts for short text entries. "
-        "Return a JSON array of strings. Avoid player names and keep prompts punchy."
+        "Create 20 Vote Battle prompts for short text entries. "
+        "Return a JSON array of strings. Keep prompts punchy."
     )
-    text, err = call_openai(prompt)
+    text, err = shared_call_openai(prompt)
     if err:
         return None, err
     data = parse_json_from_text(text or "")
@@ -2428,9 +2865,250 @@ def generate_votebattle_prompts() -> Tuple[Optional[List[str]], Optional[str]]:
     return items, None
 
 
+PROMPT_GENERATORS: Dict[str, Callable[[], Tuple[Optional[List[Any]], Optional[str]]]] = {
+    "mlt": generate_mlt_prompts,
+    "wyr": generate_wyr_prompts,
+    "trivia": generate_trivia_questions,
+    "hotseat": generate_hotseat_prompts,
+    "quickdraw": generate_quickdraw_prompts,
+    "wavelength": generate_wavelength_prompts,
+    "votebattle": generate_votebattle_prompts,
+}
+
+GENERATED_POOL_NOUNS = {
+    "mlt": "MLT prompts",
+    "wyr": "WYR prompts",
+    "trivia": "trivia questions",
+    "hotseat": "hot seat prompts",
+    "quickdraw": "quick draw prompts",
+    "wavelength": "wavelength prompts",
+    "votebattle": "vote battle prompts",
+}
+
+
+def generate_all_content() -> Dict[str, Tuple[Optional[List[Any]], Optional[str]]]:
+    # Each generator just waits on its own HTTP call, so threads overlap them into ~one round trip.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(PROMPT_GENERATORS)) as pool:
+        futures = {mode: pool.submit(generate) for mode, generate in PROMPT_GENERATORS.items()}
+        return {mode: future.result() for mode, future in futures.items()}
+
+
+def install_generated_pool_locked(state: Dict[str, Any], mode: str, items: List[Any]) -> None:
+    global MLT_PROMPTS, WYR_PROMPTS, TRIVIA_QUESTIONS, HOTSEAT_PROMPTS
+    global QUICKDRAW_PROMPTS, SPECTRUM_PROMPTS, VOTEBATTLE_PROMPTS
+    if mode == "mlt":
+        MLT_PROMPTS = freeze_prompts(items)
+    elif mode == "wyr":
+        WYR_PROMPTS = tuple(items)
+    elif mode == "trivia":
+        TRIVIA_QUESTIONS = tuple(items)
+    elif mode == "hotseat":
+        HOTSEAT_PROMPTS = freeze_prompts(items)
+    elif mode == "quickdraw":
+        QUICKDRAW_PROMPTS = freeze_prompts(items)
+    elif mode == "wavelength":
+        SPECTRUM_PROMPTS = freeze_prompts(items)
+    elif mode == "votebattle":
+        VOTEBATTLE_PROMPTS = freeze_prompts(items)
+    reset_pool(state, mode)
+
+
+STATE_ATOMS = frozenset((str, int, float, bool, type(None)))
+
+
+def clone_state_value(value: Any) -> Any:
+    # STATE is plain dicts/lists of JSON-like scalars (with some int keys, so no JSON round-trip);
+    # a type dispatch skips deepcopy's memo and __reduce_ex__ machinery.
+    kind = type(value)
+    if kind in STATE_ATOMS:
+        return value
+    if kind is dict:
+        return {key: clone_state_value(item) for key, item in value.items()}
+    if kind is list:
+        return [clone_state_value(item) for item in value]
+    return copy.deepcopy(value)
+
+
 def get_state_snapshot() -> Dict[str, Any]:
+    # Snapshots are shared read-only copies, rebuilt only after mark_state_changed_locked().
+    # The cache check runs without the lock; a reader racing a writer just gets the previous copy.
+    global SNAPSHOT_CACHE
+    version, snapshot = SNAPSHOT_CACHE
+    if snapshot is not None and version == STATE_VERSION:
+        return snapshot
     with STATE_LOCK:
-        return copy.deepcopy(STATE)
+        version, snapshot = SNAPSHOT_CACHE
+        if snapshot is None or version != STATE_VERSION:
+            snapshot = clone_state_value(STATE)
+            SNAPSHOT_CACHE = (STATE_VERSION, snapshot)
+        return snapshot
+
+
+def mark_state_changed_locked() -> None:
+    global STATE_VERSION
+    STATE_VERSION += 1
+    STATE_CHANGED.notify_all()
+
+
+def build_public_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "phase": state.get("phase"),
+        "mode": state.get("mode"),
+        "round_id": state.get("round_id", 0),
+        "votebattle_phase": state.get("votebattle_phase"),
+        "spyfall_phase": state.get("spyfall_phase"),
+        "mafia_phase": state.get("mafia_phase"),
+        "trivia_buzzer_phase": state.get("trivia_buzzer_phase"),
+        "submissions_locked": state.get("submissions_locked", False),
+        "timer_remaining": get_timer_remaining(state),
+    }
+
+
+def get_state_json_locked(build: Callable[[Dict[str, Any]], Dict[str, Any]], state: Dict[str, Any]) -> Tuple[str, bytes]:
+    etag, body = STATE_JSON_CACHE.get(build.__name__, ("", b""))
+    if etag != f"{BOOT_ID}-{STATE_VERSION}-{get_timer_remaining(state)}":
+        payload = build(state)
+        etag = f"{BOOT_ID}-{STATE_VERSION}-{payload['timer_remaining']}"
+        body = json_dumps(payload)
+        STATE_JSON_CACHE[build.__name__] = (etag, body)
+    return etag, body
+
+
+def state_event_stream(
+    build: Callable[[Dict[str, Any]], Dict[str, Any]],
+    last_version: int,
+    tick: bool = False,
+) -> Iterator[bytes]:
+    version = last_version
+    sent = None
+    last_payload: Optional[Dict[str, Any]] = None
+    deadline = time.monotonic() + SSE_STREAM_SECONDS
+    yield b"retry: %d\n\n" % PUBLIC_POLL_MS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        timeout = min(SSE_KEEPALIVE_SECONDS, remaining)
+        with STATE_CHANGED:
+            timer_deadline = STATE.get("timer_deadline_ns")
+            if tick and timer_deadline is not None and STATE.get("timer_enabled") and not STATE.get("timer_expired"):
+                # Wake at the deadline so expiry (and auto-advance) is pushed without the host polling.
+                timeout = max(0.0, min(timeout, (timer_deadline - time.monotonic_ns()) / 1_000_000_000 + 0.05))
+            STATE_CHANGED.wait_for(lambda: STATE_VERSION != version, timeout=timeout)
+            if tick:
+                tick_timer_locked(STATE)
+            if STATE_VERSION == version:
+                payload = None
+            else:
+                version = STATE_VERSION
+                payload = build(STATE)
+                timer_deadline = STATE.get("timer_deadline_ns")
+        # Most version bumps leave a given view untouched; only push when it moved.
+        # The ticking remaining count is left out, but a restarted timer still counts as a change.
+        key = None if payload is None else (
+            timer_deadline,
+            tuple(v for k, v in payload.items() if k != "timer_remaining"),
+        )
+        if payload is None or key == sent:
+            yield b": keepalive\n\n"
+        else:
+            sent = key
+            # The first frame on a connection is the full view; later frames carry only the keys
+            # that changed (views have a fixed key set) and clients merge them into what they hold.
+            if last_payload is None:
+                frame = payload
+            else:
+                frame = {k: v for k, v in payload.items() if last_payload.get(k) != v}
+            last_payload = payload
+            yield b"id: %s-%d\ndata: %s\n\n" % (BOOT_ID.encode("ascii"), version, json_dumps(frame))
+
+
+def set_event_stream_limit(limit: int) -> None:
+    global SSE_STREAM_SLOTS
+    SSE_STREAM_SLOTS = threading.BoundedSemaphore(max(0, limit))
+
+
+def event_stream_response(build: Callable[[Dict[str, Any]], Dict[str, Any]], tick: bool = False) -> Any:
+    slots = SSE_STREAM_SLOTS
+    if not slots.acquire(blocking=False):
+        # 204 tells EventSource not to reconnect; the page falls back to ETag polling.
+        return current_app.response_class(status=204)
+    boot_id, _, version = request.headers.get("Last-Event-ID", "").partition("-")
+    try:
+        last_version = int(version) if boot_id == BOOT_ID else -1
+    except ValueError:
+        last_version = -1
+    response = current_app.response_class(
+        state_event_stream(build, last_version, tick),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(slots.release)
+    return response
+
+
+def build_host_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    submission_target = get_submission_target_count(state)
+    progress_percent = int((get_active_submission_count(state) / submission_target) * 100) if submission_target else 0
+    show_progress_button, progress_label = get_progress_ui(
+        state.get("mode", ""),
+        state.get("phase", ""),
+        state.get("votebattle_phase"),
+        state.get("spyfall_phase"),
+        state.get("mafia_phase"),
+        state.get("trivia_buzzer_phase"),
+    )
+    buzz_winner_pid = state.get("buzz_winner_pid")
+    buzz_winner_name = state.get("players", {}).get(buzz_winner_pid, {}).get("name") if buzz_winner_pid else ""
+    buzz_team_id = state.get("buzz_winner_team_id")
+    buzz_team_label = state.get("team_names", {}).get(buzz_team_id) if buzz_team_id else ""
+    buzz_winner_display = (
+        f"{buzz_winner_name} ({buzz_team_label})"
+        if buzz_winner_name and buzz_team_label
+        else buzz_winner_name
+        if buzz_winner_name
+        else "--"
+    )
+    answer_pid = state.get("answer_pid")
+    answer_name = state.get("players", {}).get(answer_pid, {}).get("name") if answer_pid else ""
+    answer_team_id = state.get("answer_team_id")
+    answer_team_label = state.get("team_names", {}).get(answer_team_id) if answer_team_id else ""
+    answer_display = (
+        f"{answer_name} ({answer_team_label})"
+        if answer_name and answer_team_label
+        else answer_name
+        if answer_name
+        else "--"
+    )
+    return {
+        "player_count": len(state.get("players", {})),
+        "submission_count": get_active_submission_count(state),
+        "submission_target": submission_target,
+        "progress_percent": progress_percent,
+        "submission_names": get_active_submission_names(state),
+        "mode": state.get("mode"),
+        "mode_label": label_for_mode(state.get("mode", "")),
+        "phase": state.get("phase"),
+        "phase_label": label_for_phase(state.get("phase", "")),
+        "round_id": state.get("round_id", 0),
+        "prompt": state.get("prompt", ""),
+        "options": list(state.get("options", [])),
+        "lobby_locked": state.get("lobby_locked", False),
+        "allow_renames": state.get("allow_renames", True),
+        "wavelength_target": state.get("wavelength_target"),
+        "votebattle_phase": state.get("votebattle_phase"),
+        "votebattle_submit_count": len(state.get("votebattle_entries", {})),
+        "votebattle_vote_count": len(state.get("votebattle_votes", {})),
+        "spyfall_phase": state.get("spyfall_phase"),
+        "mafia_phase": state.get("mafia_phase"),
+        "trivia_buzzer_phase": state.get("trivia_buzzer_phase"),
+        "submissions_locked": state.get("submissions_locked", False),
+        "timer_remaining": get_timer_remaining(state),
+        "show_progress_button": show_progress_button,
+        "progress_label": progress_label,
+        "buzz_winner_display": buzz_winner_display,
+        "answer_display": answer_display,
+    }
 
 
 def label_for_mode(mode: str) -> str:
@@ -2462,6 +3140,48 @@ PROGRESS_ACTION_LABELS = {
 }
 
 
+# Which resolve_progress_action sub-phase argument each multi-step mode reads; these are
+# also the modes that get a Progress button.
+PROGRESS_SUBPHASE_INDEX = {
+    "votebattle": 0,
+    "spyfall": 1,
+    "mafia": 2,
+    "trivia_buzzer": 3,
+    "team_trivia": 3,
+    "team_jeopardy": 4,
+    "relay_trivia": 5,
+    "trivia_draft": 6,
+    "wager_trivia": 7,
+    "estimation_duel": 8,
+}
+# (mode, phase, sub_phase) -> action; None in the phase or sub-phase slot matches any value.
+PROGRESS_ACTIONS = {
+    ("votebattle", "in_round", "submit"): "votebattle_start_vote",
+    ("votebattle", "in_round", "vote"): "reveal",
+    ("spyfall", "in_round", "question"): "spyfall_start_vote",
+    ("spyfall", "in_round", "vote"): "reveal",
+    ("mafia", "in_round", "night"): "mafia_start_day",
+    ("mafia", "in_round", "day"): "mafia_resolve_day",
+    ("mafia", "revealed", None): "mafia_end_game",
+    ("mafia", None, "over"): "mafia_end_game",
+    ("trivia_buzzer", "in_round", "buzz"): "buzzer_start_answer",
+    ("trivia_buzzer", "in_round", "answer"): "buzzer_resolve_answer",
+    ("trivia_buzzer", "in_round", "steal"): "reveal",
+    ("team_trivia", "in_round", "buzz"): "buzzer_start_answer",
+    ("team_trivia", "in_round", "answer"): "buzzer_resolve_answer",
+    ("team_trivia", "in_round", "steal"): "reveal",
+    ("team_jeopardy", "in_round", "clue"): "jeopardy_start_answer",
+    ("team_jeopardy", "in_round", "reveal"): "jeopardy_back_to_board",
+    ("relay_trivia", "in_round", "question"): "relay_reveal",
+    ("trivia_draft", "in_round", "draft"): "draft_start_answers",
+    ("trivia_draft", "in_round", "answer"): "draft_resolve_answer",
+    ("trivia_draft", "in_round", "steal"): "draft_resolve_steal",
+    ("wager_trivia", "in_round", "wager"): "wager_start_question",
+    ("wager_trivia", "in_round", "question"): "wager_reveal",
+    ("estimation_duel", "in_round", "submit"): "estimate_reveal",
+}
+
+
 def resolve_progress_action(
     mode: str,
     phase: str,
@@ -2475,73 +3195,25 @@ def resolve_progress_action(
     wager_phase: Optional[str] = None,
     estimate_phase: Optional[str] = None,
 ) -> Optional[str]:
-    if mode == "votebattle":
-        if phase == "in_round" and votebattle_phase == "submit":
-            return "votebattle_start_vote"
-        if phase == "in_round" and votebattle_phase == "vote":
-            return "reveal"
-        return None
-    if mode == "spyfall":
-        if phase == "in_round" and spyfall_phase == "question":
-            return "spyfall_start_vote"
-        if phase == "in_round" and spyfall_phase == "vote":
-            return "reveal"
-        return None
-    if mode == "mafia":
-        if phase == "in_round" and mafia_phase == "night":
-            return "mafia_start_day"
-        if phase == "in_round" and mafia_phase == "day":
-            return "mafia_resolve_day"
-        if mafia_phase == "over" or phase == "revealed":
-            return "mafia_end_game"
-        return None
-    if mode in ("trivia_buzzer", "team_trivia"):
-        if phase != "in_round":
-            return None
-        if trivia_buzzer_phase == "buzz":
-            return "buzzer_start_answer"
-        if trivia_buzzer_phase == "answer":
-            return "buzzer_resolve_answer"
-        if trivia_buzzer_phase == "steal":
-            return "reveal"
-        return None
-    if mode == "team_jeopardy":
-        if phase != "in_round":
-            return None
-        if jeopardy_phase == "clue":
-            return "jeopardy_start_answer"
-        if jeopardy_phase == "reveal":
-            return "jeopardy_back_to_board"
-        return None
-    if mode == "relay_trivia":
-        if phase == "in_round" and relay_phase == "question":
-            return "relay_reveal"
-        return None
-    if mode == "trivia_draft":
-        if phase != "in_round":
-            return None
-        if draft_phase == "draft":
-            return "draft_start_answers"
-        if draft_phase == "answer":
-            return "draft_resolve_answer"
-        if draft_phase == "steal":
-            return "draft_resolve_steal"
-        return None
-    if mode == "wager_trivia":
-        if phase != "in_round":
-            return None
-        if wager_phase == "wager":
-            return "wager_start_question"
-        if wager_phase == "question":
-            return "wager_reveal"
-        return None
-    if mode == "estimation_duel":
-        if phase == "in_round" and estimate_phase == "submit":
-            return "estimate_reveal"
-        return None
-    if phase == "in_round":
-        return "reveal"
-    return None
+    index = PROGRESS_SUBPHASE_INDEX.get(mode)
+    if index is None:
+        return "reveal" if phase == "in_round" else None
+    sub_phase = (
+        votebattle_phase,
+        spyfall_phase,
+        mafia_phase,
+        trivia_buzzer_phase,
+        jeopardy_phase,
+        relay_phase,
+        draft_phase,
+        wager_phase,
+        estimate_phase,
+    )[index]
+    return (
+        PROGRESS_ACTIONS.get((mode, phase, sub_phase))
+        or PROGRESS_ACTIONS.get((mode, phase, None))
+        or PROGRESS_ACTIONS.get((mode, None, sub_phase))
+    )
 
 
 def get_progress_ui(
@@ -2557,18 +3229,7 @@ def get_progress_ui(
     wager_phase: Optional[str] = None,
     estimate_phase: Optional[str] = None,
 ) -> Tuple[bool, str]:
-    if mode not in (
-        "votebattle",
-        "spyfall",
-        "mafia",
-        "trivia_buzzer",
-        "team_trivia",
-        "team_jeopardy",
-        "relay_trivia",
-        "trivia_draft",
-        "wager_trivia",
-        "estimation_duel",
-    ):
+    if mode not in PROGRESS_SUBPHASE_INDEX:
         return False, ""
     action = resolve_progress_action(
         mode,
@@ -2591,31 +3252,25 @@ def get_progress_ui(
 
 def reset_timer_locked(state: Dict[str, Any], seconds: Optional[int]) -> None:
     if not state.get("timer_enabled"):
-        state["timer_start_ts"] = None
-        state["timer_duration"] = None
-        state["timer_expired"] = False
+        stop_timer_locked(state)
         return
-    duration = int(seconds or state.get("timer_seconds", TIMER_DEFAULT_SECONDS))
-    state["timer_start_ts"] = time.time()
-    state["timer_duration"] = max(1, duration)
+    duration = max(1, int(seconds or state.get("timer_seconds", TIMER_DEFAULT_SECONDS)))
+    state["timer_deadline_ns"] = time.monotonic_ns() + duration * 1_000_000_000
     state["timer_expired"] = False
 
 
 def stop_timer_locked(state: Dict[str, Any]) -> None:
-    state["timer_start_ts"] = None
-    state["timer_duration"] = None
+    state["timer_deadline_ns"] = None
     state["timer_expired"] = False
 
 
 def get_timer_remaining(state: Dict[str, Any]) -> Optional[int]:
     if not state.get("timer_enabled"):
         return None
-    start = state.get("timer_start_ts")
-    duration = state.get("timer_duration")
-    if not start or not duration:
+    deadline = state.get("timer_deadline_ns")
+    if deadline is None:
         return None
-    remaining = int(duration - (time.time() - start))
-    return max(0, remaining)
+    return max(0, (deadline - time.monotonic_ns()) // 1_000_000_000)
 
 
 def tick_timer_locked(state: Dict[str, Any]) -> Optional[int]:
@@ -2627,6 +3282,7 @@ def tick_timer_locked(state: Dict[str, Any]) -> Optional[int]:
     if state.get("timer_expired"):
         return 0
     state["timer_expired"] = True
+    mark_state_changed_locked()
     if state.get("late_submit_policy") == "lock_after_timer":
         state["submissions_locked"] = True
     if not state.get("auto_advance"):
@@ -2635,71 +3291,75 @@ def tick_timer_locked(state: Dict[str, Any]) -> Optional[int]:
         return 0
 
     mode = state.get("mode")
-    if mode == "votebattle":
-        if state.get("votebattle_phase") == "submit":
-            if state.get("votebattle_entries"):
-                state["votebattle_phase"] = "vote"
-                state["submissions_locked"] = False
-                reset_timer_locked(state, state.get("vote_timer_seconds"))
-                state["host_message"] = "Timer: Vote Battle voting started."
-            return 0
-        if state.get("votebattle_phase") == "vote":
-            compute_results_locked()
-            state["phase"] = "revealed"
-            state["host_message"] = "Timer: Results revealed."
-            return 0
-
-    if mode == "spyfall":
-        if state.get("spyfall_phase") == "question":
-            if not state.get("spyfall_auto_start_vote_on_timer", True):
-                return 0
-            if state.get("players"):
-                state["spyfall_phase"] = "vote"
-                state["submissions"] = {}
-                state["submissions_locked"] = False
-                reset_timer_locked(state, state.get("vote_timer_seconds"))
-                state["host_message"] = "Timer: Spyfall voting started."
-            return 0
-        if state.get("spyfall_phase") == "vote":
-            compute_results_locked()
-            state["phase"] = "revealed"
-            state["host_message"] = "Timer: Results revealed."
-            return 0
-
-    if mode in ("trivia_buzzer", "team_trivia"):
-        trivia_phase = state.get("trivia_buzzer_phase")
-        if trivia_phase == "buzz":
-            if state.get("buzz_winner_pid"):
-                state["trivia_buzzer_phase"] = "answer"
-                state["submissions_locked"] = False
-                reset_timer_locked(state, state.get("vote_timer_seconds"))
-                state["host_message"] = "Timer: Answer phase started."
-            else:
-                compute_results_locked()
-                state["phase"] = "revealed"
-                state["host_message"] = "Timer: No buzz."
-            return 0
-        if trivia_phase in ("answer", "steal"):
-            compute_results_locked()
-            state["phase"] = "revealed"
-            state["host_message"] = "Timer: Results revealed."
-            return 0
+    phase_key = TIMER_PHASE_KEYS.get(mode)
+    handler = TIMER_EXPIRY_HANDLERS.get((mode, state.get(phase_key) if phase_key else None), timer_reveal_locked)
+    handler(state)
+    return 0
 
-    if mode == "mafia":
-        return 0
 
+def timer_reveal_locked(state: Dict[str, Any]) -> None:
     compute_results_locked()
     state["phase"] = "revealed"
     state["host_message"] = "Timer: Results revealed."
-    return 0
+
+
+def timer_votebattle_submit_locked(state: Dict[str, Any]) -> None:
+    if state.get("votebattle_entries"):
+        state["votebattle_phase"] = "vote"
+        state["submissions_locked"] = False
+        reset_timer_locked(state, state.get("vote_timer_seconds"))
+        state["host_message"] = "Timer: Vote Battle voting started."
+
+
+def timer_spyfall_question_locked(state: Dict[str, Any]) -> None:
+    if not state.get("spyfall_auto_start_vote_on_timer", True):
+        return
+    if state.get("players"):
+        state["spyfall_phase"] = "vote"
+        state["submissions"] = {}
+        state["submissions_locked"] = False
+        reset_timer_locked(state, state.get("vote_timer_seconds"))
+        state["host_message"] = "Timer: Spyfall voting started."
+
+
+def timer_trivia_buzz_locked(state: Dict[str, Any]) -> None:
+    if state.get("buzz_winner_pid"):
+        state["trivia_buzzer_phase"] = "answer"
+        state["submissions_locked"] = False
+        reset_timer_locked(state, state.get("vote_timer_seconds"))
+        state["host_message"] = "Timer: Answer phase started."
+    else:
+        compute_results_locked()
+        state["phase"] = "revealed"
+        state["host_message"] = "Timer: No buzz."
+
+
+def timer_ignore_locked(state: Dict[str, Any]) -> None:
+    return None
+
+
+# Auto-advance on timer expiry, keyed by (mode, sub-phase); anything unlisted reveals results.
+TIMER_PHASE_KEYS = {
+    "votebattle": "votebattle_phase",
+    "spyfall": "spyfall_phase",
+    "trivia_buzzer": "trivia_buzzer_phase",
+    "team_trivia": "trivia_buzzer_phase",
+}
+TIMER_EXPIRY_HANDLERS: Dict[Tuple[Any, Any], Callable[[Dict[str, Any]], None]] = {
+    ("votebattle", "submit"): timer_votebattle_submit_locked,
+    ("spyfall", "question"): timer_spyfall_question_locked,
+    ("trivia_buzzer", "buzz"): timer_trivia_buzz_locked,
+    ("team_trivia", "buzz"): timer_trivia_buzz_locked,
+    ("mafia", None): timer_ignore_locked,
+}
 
 
 def get_scoreboard(players: Dict[str, Dict[str, str]], scores: Dict[str, int]) -> List[Dict[str, Any]]:
-    rows = []
-    for pid, info in players.items():
-        rows.append({"pid": pid, "name": info.get("name", "Unknown"), "score": scores.get(pid, 0)})
-    rows.sort(key=lambda row: (-row["score"], row["name"].lower()))
-    return rows
+    order = sorted(
+        (-scores.get(pid, 0), info.get("name", "Unknown").lower(), idx, pid, info.get("name", "Unknown"))
+        for idx, (pid, info) in enumerate(players.items())
+    )
+    return [{"pid": pid, "name": name, "score": -neg_score} for neg_score, _, _, pid, name in order]
 
 
 def ensure_team_names(state: Dict[str, Any]) -> None:
@@ -2715,11 +3375,8 @@ def assign_team_for_new_player(state: Dict[str, Any], pid: str) -> None:
         return
     count = int(state.get("team_count", 2))
     ensure_team_names(state)
-    counts = {team_id: 0 for team_id in range(1, count + 1)}
-    for _, team_id in state.get("teams", {}).items():
-        if team_id in counts:
-            counts[team_id] += 1
-    min_count = min(counts.values()) if counts else 0
+    counts = build_tally(state.get("teams", {}), range(1, count + 1))
+    min_count = min(counts.values(), default=0)
     candidates = [team_id for team_id, value in counts.items() if value == min_count]
     team_id = random.choice(candidates) if candidates else 1
     state.setdefault("teams", {})[pid] = team_id
@@ -2742,20 +3399,18 @@ def get_team_scoreboard(state: Dict[str, Any]) -> List[Dict[str, Any]]:
         return []
     count = int(state.get("team_count", 2))
     ensure_team_names(state)
-    totals = {team_id: 0 for team_id in range(1, count + 1)}
+    teams = state.get("teams", {})
+    team_names = state.get("team_names", {})
+    # Totals indexed by team id (slot 0 unused) skip dict hashing on every add.
+    totals = [0] * (count + 1)
     for pid, score in state.get("scores", {}).items():
-        team_id = state.get("teams", {}).get(pid)
-        if team_id in totals:
+        team_id = teams.get(pid, 0)
+        if 0 < team_id <= count:
             totals[team_id] += score
-    rows = []
-    for team_id, score in totals.items():
-        rows.append(
-            {
-                "team_id": team_id,
-                "name": state.get("team_names", {}).get(team_id, f"Team {team_id}"),
-                "score": score,
-            }
-        )
+    rows = [
+        {"team_id": team_id, "name": team_names.get(team_id, f"Team {team_id}"), "score": totals[team_id]}
+        for team_id in range(1, count + 1)
+    ]
     rows.sort(key=lambda row: (-row["score"], row["name"].lower()))
     return rows
 
@@ -2778,15 +3433,8 @@ def get_team_name(state: Dict[str, Any], team_id: Optional[int]) -> str:
 def get_active_team_ids(state: Dict[str, Any]) -> List[int]:
     if not state.get("teams_enabled"):
         return []
-    players = state.get("players", {})
     team_map = state.get("teams", {})
-    seen: List[int] = []
-    for pid in players:
-        team_id = team_map.get(pid)
-        if team_id and team_id not in seen:
-            seen.append(team_id)
-    seen.sort()
-    return seen
+    return sorted({team_id for team_id in map(team_map.get, state.get("players", {})) if team_id})
 
 
 def get_team_members(state: Dict[str, Any], team_id: int) -> List[str]:
@@ -2799,11 +3447,11 @@ def get_team_members(state: Dict[str, Any], team_id: int) -> List[str]:
 def apply_score_delta(state: Dict[str, Any], pid: str, delta: int, *, floor_zero: bool = False) -> None:
     if pid not in state.get("players", {}):
         return
-    current = state.get("scores", {}).get(pid, 0)
-    updated = current + delta
+    scores = state.setdefault("scores", {})
+    updated = scores.get(pid, 0) + delta
     if floor_zero:
         updated = max(0, updated)
-    state.setdefault("scores", {})[pid] = updated
+    scores[pid] = updated
 
 
 def apply_team_score_delta(
@@ -2817,8 +3465,12 @@ def apply_team_score_delta(
     return members
 
 
+JEOPARDY_STRIP_RE = re.compile(r"[^a-z0-9 ]")
+
+
+@functools.lru_cache(maxsize=4096)
 def normalize_jeopardy_answer(text: str) -> str:
-    cleaned = re.sub(r"[^a-z0-9 ]", " ", text.lower())
+    cleaned = JEOPARDY_STRIP_RE.sub(" ", text.lower())
     cleaned = " ".join(cleaned.split())
     for prefix in ("a ", "an ", "the "):
         if cleaned.startswith(prefix):
@@ -2831,22 +3483,31 @@ def jeopardy_answer_matches(guess: str, answer: str) -> bool:
     return normalize_jeopardy_answer(guess) == normalize_jeopardy_answer(answer)
 
 
+# Clue rows are formatted once; a board build only shuffles categories and copies the rows.
+JEOPARDY_BOARD_TEMPLATE: Tuple[Tuple[str, Tuple[Dict[str, Any], ...]], ...] = tuple(
+    (
+        str(category.get("category", "Category")),
+        tuple(
+            {
+                "value": (idx + 1) * 100,
+                "question": str(clue.get("question", "")),
+                "answer": str(clue.get("answer", "")),
+                "used": False,
+            }
+            for idx, clue in enumerate(category.get("clues", []))
+        ),
+    )
+    for category in JEOPARDY_CATEGORIES
+)
+
+
 def build_jeopardy_board() -> List[Dict[str, Any]]:
-    categories = JEOPARDY_CATEGORIES[:]
-    random.shuffle(categories)
+    order = list(range(len(JEOPARDY_BOARD_TEMPLATE)))
+    random.shuffle(order)
     board = []
-    for category in categories:
-        clues = []
-        for idx, clue in enumerate(category.get("clues", [])):
-            clues.append(
-                {
-                    "value": (idx + 1) * 100,
-                    "question": str(clue.get("question", "")),
-                    "answer": str(clue.get("answer", "")),
-                    "used": False,
-                }
-            )
-        board.append({"category": str(category.get("category", "Category")), "clues": clues})
+    for idx in order:
+        name, clues = JEOPARDY_BOARD_TEMPLATE[idx]
+        board.append({"category": name, "clues": [dict(clue) for clue in clues]})
     return board
 
 
@@ -2875,25 +3536,53 @@ def mark_jeopardy_selected_used(state: Dict[str, Any]) -> None:
         clue["used"] = True
 
 
-def next_captain_for_team(state: Dict[str, Any], team_id: int, current_pid: Optional[str]) -> Optional[str]:
-    members = get_team_members(state, team_id)
+def next_captain_for_team(
+    state: Dict[str, Any],
+    team_id: int,
+    current_pid: Optional[str],
+    members: Optional[List[str]] = None,
+) -> Optional[str]:
+    if members is None:
+        members = get_team_members(state, team_id)
     if not members:
         return None
-    if current_pid in members:
-        idx = members.index(current_pid)
-        return members[(idx + 1) % len(members)]
-    return members[0]
+    if current_pid not in members:
+        return members[0]
+    return members[(members.index(current_pid) + 1) % len(members)]
+
+
+def get_team_rosters(state: Dict[str, Any]) -> Dict[int, List[str]]:
+    players = state.get("players", {})
+    rosters: Dict[int, List[str]] = {}
+    for pid, team_id in state.get("teams", {}).items():
+        if pid in players:
+            rosters.setdefault(team_id, []).append(pid)
+    for members in rosters.values():
+        members.sort(key=lambda pid: players[pid].get("name", "").lower())
+    return rosters
 
 
 def rotate_relay_captains(state: Dict[str, Any]) -> Dict[int, str]:
     captains = {}
     previous = state.get("relay_captains", {})
+    # One grouping pass for every team instead of a full teams scan and sort per team.
+    rosters = get_team_rosters(state)
     for team_id in get_active_team_ids(state):
-        captains[team_id] = next_captain_for_team(state, team_id, previous.get(team_id))
+        captains[team_id] = next_captain_for_team(state, team_id, previous.get(team_id), rosters.get(team_id, []))
     state["relay_captains"] = captains
     return captains
 
 
+def iter_random_indices(n: int) -> Iterator[int]:
+    # Lazy Fisher-Yates: each yielded index costs one swap, so a caller that stops after k
+    # draws never pays for shuffling the rest.
+    order = list(range(n))
+    for end in range(n - 1, -1, -1):
+        pick = random.randrange(end + 1)
+        order[pick], order[end] = order[end], order[pick]
+        yield order[end]
+
+
 def build_trivia_pool(
     count: int, *, manual_question: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
@@ -2902,17 +3591,17 @@ def build_trivia_pool(
     if manual_question:
         pool.append(manual_question)
         used_questions.add(manual_question.get("question", "").strip().lower())
-    questions = TRIVIA_QUESTIONS[:]
-    random.shuffle(questions)
-    for question in questions:
+    for idx in iter_random_indices(len(TRIVIA_QUESTIONS)):
         if len(pool) >= count:
             break
-        text = str(question.get("question", "")).strip().lower()
+        question = TRIVIA_QUESTIONS[idx]
+        question_text = str(question.get("question", ""))
+        text = question_text.strip().lower()
         if not text or text in used_questions:
             continue
         pool.append(
             {
-                "question": str(question.get("question", "")),
+                "question": question_text,
                 "options": list(question.get("options", [])),
                 "correct_index": int(question.get("answer_index", 0)),
             }
@@ -2974,10 +3663,7 @@ def pick_first_correct_team(
 ) -> Optional[int]:
     if correct_index is None:
         return None
-    for team_id, choice in choices.items():
-        if choice == correct_index:
-            return team_id
-    return None
+    return next((team_id for team_id, choice in choices.items() if choice == correct_index), None)
 
 
 def resolve_estimation_winners(
@@ -2986,22 +3672,28 @@ def resolve_estimation_winners(
     guesses: List[Dict[str, Any]] = []
     if target is None:
         return [], guesses
+    # One pass tracks the closest guesses overall and, for price-is-right, the closest not over.
+    closest = closest_under = None
+    winners: List[Any] = []
+    winners_under: List[Any] = []
     for key, value in submissions.items():
         try:
             guess = int(value)
         except (TypeError, ValueError):
             continue
-        guesses.append({"key": key, "guess": guess, "distance": abs(guess - target), "over": guess > target})
-    if not guesses:
-        return [], guesses
-    eligible = guesses
-    if price_is_right:
-        eligible = [row for row in guesses if not row["over"]]
-        if not eligible:
-            eligible = guesses
-    closest = min(row["distance"] for row in eligible)
-    winners = [row["key"] for row in eligible if row["distance"] == closest]
-    return winners, guesses
+        distance = abs(guess - target)
+        over = guess > target
+        guesses.append({"key": key, "guess": guess, "distance": distance, "over": over})
+        if closest is None or distance < closest:
+            closest, winners = distance, [key]
+        elif distance == closest:
+            winners.append(key)
+        if price_is_right and not over:
+            if closest_under is None or distance < closest_under:
+                closest_under, winners_under = distance, [key]
+            elif distance == closest_under:
+                winners_under.append(key)
+    return winners_under or winners, guesses
 
 def select_buzz_winner(
     existing_pid: Optional[str],
@@ -3019,10 +3711,7 @@ def select_buzz_winner(
 def pick_first_correct_steal(steal_attempts: Dict[str, int], correct_index: Optional[int]) -> Optional[str]:
     if correct_index is None:
         return None
-    for pid, choice in steal_attempts.items():
-        if choice == correct_index:
-            return pid
-    return None
+    return next((pid for pid, choice in steal_attempts.items() if choice == correct_index), None)
 
 
 def compute_trivia_buzzer_outcome(
@@ -3040,23 +3729,22 @@ def compute_trivia_buzzer_outcome(
     }
     if correct_index is None or not buzz_winner_pid:
         return outcome
-    if answer_choice is None:
-        steal_pid = pick_first_correct_steal(steal_attempts, correct_index)
-        if steal_pid:
-            outcome.update({"steal_pid": steal_pid, "scoring_pid": steal_pid, "points": 1})
-        return outcome
     if answer_choice == correct_index:
         scorer = answer_pid or buzz_winner_pid
         outcome.update({"buzz_correct": True, "scoring_pid": scorer, "points": 2})
         return outcome
+    # No answer or a wrong one: the first correct steal (if any) scores.
     steal_pid = pick_first_correct_steal(steal_attempts, correct_index)
     if steal_pid:
         outcome.update({"steal_pid": steal_pid, "scoring_pid": steal_pid, "points": 1})
     return outcome
 
 
+TRIVIA_POOL_MODES = frozenset(("trivia", "trivia_buzzer", "team_trivia"))
+
+
 def pool_key_for_mode(mode: str) -> str:
-    if mode in ("trivia", "trivia_buzzer", "team_trivia"):
+    if mode in TRIVIA_POOL_MODES:
         return "trivia"
     if mode == "spyfall":
         return "spyfall"
@@ -3073,10 +3761,10 @@ def draw_from_pool(state: Dict[str, Any], key: str, n: int) -> int:
         bag = list(range(n))
         random.shuffle(bag)
         last = prompt_last.get(key)
-        if n >= 2 and last is not None and bag and bag[0] == last:
-            bag[0], bag[1] = bag[1], bag[0]
+        if n >= 2 and last is not None and bag[-1] == last:
+            bag[-1], bag[-2] = bag[-2], bag[-1]
         prompt_bags[key] = bag
-    choice = bag.pop(0)
+    choice = bag.pop()
     prompt_last[key] = choice
     return choice
 
@@ -3086,70 +3774,87 @@ def reset_pool(state: Dict[str, Any], key: str) -> None:
     state.setdefault("prompt_last", {}).pop(key, None)
 
 
+def pick_text_prompt(
+    state: Dict[str, Any], key: str, prompts: Tuple[str, ...], fallback: str
+) -> Tuple[str, List[str], Optional[int]]:
+    if not prompts:
+        return fallback, [], None
+    return prompts[draw_from_pool(state, key, len(prompts))], [], None
+
+
+def pick_mlt_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    return pick_text_prompt(state, "mlt", MLT_PROMPTS, "Who is most likely to plan the next party?")
+
+
+def pick_wyr_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    if WYR_PROMPTS:
+        choice = WYR_PROMPTS[draw_from_pool(state, "wyr", len(WYR_PROMPTS))]
+        return "Would you rather...", [choice["a"], choice["b"]], None
+    return "Would you rather...", ["Option A", "Option B"], None
+
+
+def pick_trivia_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    if TRIVIA_QUESTIONS:
+        question = TRIVIA_QUESTIONS[draw_from_pool(state, "trivia", len(TRIVIA_QUESTIONS))]
+    else:
+        question = {
+            "question": "What color is the sky on a clear day?",
+            "options": ["Green", "Blue", "Red", "Yellow"],
+            "answer_index": 1,
+        }
+    return question["question"], list(question["options"]), int(question["answer_index"])
+
+
+def pick_hotseat_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    return pick_text_prompt(state, "hotseat", HOTSEAT_PROMPTS, "Hot seat: Share your hottest take.")
+
+
+def pick_quickdraw_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    return pick_text_prompt(state, "quickdraw", QUICKDRAW_PROMPTS, "Name a party snack.")
+
+
+def pick_wavelength_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    return pick_text_prompt(state, "wavelength", SPECTRUM_PROMPTS, "Cold <-> Hot")
+
+
+def pick_votebattle_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    return pick_text_prompt(state, "votebattle", VOTEBATTLE_PROMPTS, "Best excuse for being late.")
+
+
+def pick_spyfall_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    if SPYFALL_LOCATIONS:
+        choice = SPYFALL_LOCATIONS[draw_from_pool(state, "spyfall", len(SPYFALL_LOCATIONS))]
+    else:
+        choice = {"location": "Movie Theater"}
+    roles = choice.get("roles") or []
+    return str(choice.get("location", "Movie Theater")), [str(role) for role in roles], None
+
+
+def pick_mafia_prompt(state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
+    return "Mafia: Night falls...", [], None
+
+
+# The pickers read the pool globals at call time, so regenerated pools are picked up.
+PROMPT_PICKERS: Dict[str, Callable[[Dict[str, Any]], Tuple[str, List[str], Optional[int]]]] = {
+    "mlt": pick_mlt_prompt,
+    "wyr": pick_wyr_prompt,
+    "trivia": pick_trivia_prompt,
+    "trivia_buzzer": pick_trivia_prompt,
+    "team_trivia": pick_trivia_prompt,
+    "hotseat": pick_hotseat_prompt,
+    "quickdraw": pick_quickdraw_prompt,
+    "wavelength": pick_wavelength_prompt,
+    "votebattle": pick_votebattle_prompt,
+    "spyfall": pick_spyfall_prompt,
+    "mafia": pick_mafia_prompt,
+}
+
+
 def pick_prompt_for_mode(mode: str, state: Dict[str, Any]) -> Tuple[str, List[str], Optional[int]]:
-    if mode == "mlt":
-        if MLT_PROMPTS:
-            idx = draw_from_pool(state, pool_key_for_mode(mode), len(MLT_PROMPTS))
-            prompt = MLT_PROMPTS[idx]
-        else:
-            prompt = "Who is most likely to plan the next party?"
-        return prompt, [], None
-    if mode == "wyr":
-        if WYR_PROMPTS:
-            idx = draw_from_pool(state, pool_key_for_mode(mode), len(WYR_PROMPTS))
-            choice = WYR_PROMPTS[idx]
-            return "Would you rather...", [choice["a"], choice["b"]], None
-        return "Would you rather...", ["Option A", "Option B"], None
-    if mode in ("trivia", "trivia_buzzer", "team_trivia"):
-        if TRIVIA_QUESTIONS:
-            idx = draw_from_pool(state, pool_key_for_mode(mode), len(TRIVIA_QUESTIONS))
-            question = TRIVIA_QUESTIONS[idx]
-        else:
-            question = {
-                "question": "What color is the sky on a clear day?",
-                "options": ["Green", "Blue", "Red", "Yellow"],
-                "answer_index": 1,
-            }
-        return question["question"], list(question["options"]), int(question["answer_index"])
-    if mode == "hotseat":
-        if HOTSEAT_PROMPTS:
-            idx = draw_from_pool(state, pool_key_for_mode(mode), len(HOTSEAT_PROMPTS))
-            prompt = HOTSEAT_PROMPTS[idx]
-        else:
-            prompt = "Hot seat: Share your hottest take."
-        return prompt, [], None
-    if mode == "quickdraw":
-        if QUICKDRAW_PROMPTS:
-            idx = draw_from_pool(state, pool_key_for_mode(mode), len(QUICKDRAW_PROMPTS))
-            prompt = QUICKDRAW_PROMPTS[idx]
-        else:
-            prompt = "Name a party snack."
-        return prompt, [], None
-    if mode == "wavelength":
-        if SPECTRUM_PROMPTS:
-            idx = draw_from_pool(state, pool_key_for_mode(mode), len(SPECTRUM_PROMPTS))
-            prompt = SPECTRUM_PROMPTS[idx]
-        else:
-            prompt = "Cold <-> Hot"
-        return prompt, [], None
-    if mode == "votebattle":
-        if VOTEBATTLE_PROMPTS:
-            idx = draw_from_pool(state, pool_key_for_mode(mode), len(VOTEBATTLE_PROMPTS))
-            prompt = VOTEBATTLE_PROMPTS[idx]
-        else:
-            prompt = "Best excuse for being late."
-        return prompt, [], None
-    if mode == "spyfall":
-        if SPYFALL_LOCATIONS:
-            idx = draw_from_pool(state, pool_key_for_mode(mode), len(SPYFALL_LOCATIONS))
-            choice = SPYFALL_LOCATIONS[idx]
-        else:
-            choice = {"location": "Movie Theater"}
-        roles = choice.get("roles") or []
-        return str(choice.get("location", "Movie Theater")), [str(role) for role in roles], None
-    if mode == "mafia":
-        return "Mafia: Night falls...", [], None
-    return "Waiting for host", [], None
+    picker = PROMPT_PICKERS.get(mode)
+    if picker is None:
+        return "Waiting for host", [], None
+    return picker(state)
 
 
 def resolve_prompt_for_mode(
@@ -3212,15 +3917,12 @@ def resolve_prompt_for_mode(
 
 
 def spyfall_roles_for_location(location: str) -> List[str]:
-    for entry in SPYFALL_LOCATIONS:
-        if str(entry.get("location", "")).strip().lower() == location.strip().lower():
-            roles = entry.get("roles") or []
-            return [str(role) for role in roles if str(role).strip()]
-    return ["Local", "Worker", "Visitor", "Manager", "Regular", "Rookie"]
+    return list(SPYFALL_LOCATION_ROLES.get(location.strip().lower(), SPYFALL_DEFAULT_ROLES))
 
 
-def assign_spyfall_roles(state: Dict[str, Any], roles_pool: List[str]) -> None:
-    pids = list(state.get("players", {}).keys())
+def assign_spyfall_roles(state: Dict[str, Any], roles_pool: List[str], pids: Optional[List[str]] = None) -> None:
+    if pids is None:
+        pids = list(state.get("players", {}))
     if not pids:
         return
     spy_pid = random.choice(pids)
@@ -3248,9 +3950,6 @@ def assign_mafia_roles(
 ) -> Dict[str, str]:
     if len(pids) < MAFIA_MIN_PLAYERS:
         return {}
-    roles = {}
-    shuffled = pids[:]
-    random.shuffle(shuffled)
     if auto_wolf_count:
         wolf_count = 2 if len(pids) >= 7 else 1
     else:
@@ -3259,19 +3958,16 @@ def assign_mafia_roles(
     seer_count = 1 if seer_enabled and len(pids) >= 4 else 0
     max_wolves = max(1, len(pids) - seer_count - 1)
     wolf_count = min(wolf_count, max_wolves)
-    for pid in shuffled[:wolf_count]:
-        roles[pid] = "werewolf"
-    offset = wolf_count
-    for pid in shuffled[offset : offset + seer_count]:
-        roles[pid] = "seer"
-    for pid in shuffled[offset + seer_count :]:
-        roles[pid] = "villager"
+    # Only the special roles need a random draw; everyone else stays a villager.
+    roles = dict.fromkeys(pids, "villager")
+    picks = iter_random_indices(len(pids))
+    for role in ["werewolf"] * wolf_count + ["seer"] * seer_count:
+        roles[pids[next(picks)]] = role
     return roles
 
 
 def resolve_mafia_vote(votes: Dict[str, Any], alive: List[str]) -> Optional[str]:
-    valid = list(alive)
-    tally = build_tally(votes, valid)
+    tally = build_tally(votes, alive)
     winners, _ = pick_winners_from_tally(tally)
     if not winners:
         return None
@@ -3283,11 +3979,10 @@ def check_mafia_win(state: Dict[str, Any]) -> Optional[str]:
     if not alive:
         return None
     roles = state.get("mafia_roles", {})
-    wolves = [pid for pid in alive if roles.get(pid) == "werewolf"]
-    villagers = [pid for pid in alive if roles.get(pid) != "werewolf"]
+    wolves = sum(1 for pid in alive if roles.get(pid) == "werewolf")
     if not wolves:
         return "villagers"
-    if len(wolves) >= len(villagers):
+    if wolves >= len(alive) - wolves:
         return "werewolves"
     return None
 
@@ -3303,7 +3998,8 @@ def start_new_round_locked(mode: str) -> bool:
     if mode == "team_trivia" and not STATE.get("teams_enabled"):
         STATE["host_message"] = "Team Trivia requires teams enabled."
         return False
-    if mode == "mafia" and len(STATE.get("players", {})) < MAFIA_MIN_PLAYERS:
+    pids = list(STATE.get("players", {}))
+    if mode == "mafia" and len(pids) < MAFIA_MIN_PLAYERS:
         STATE["host_message"] = f"Mafia needs at least {MAFIA_MIN_PLAYERS} players."
         return False
     STATE["round_id"] += 1
@@ -3361,24 +4057,30 @@ def start_new_round_locked(mode: str) -> bool:
     if mode == "spyfall":
         STATE["spyfall_phase"] = "question"
         STATE["spyfall_location"] = prompt
-        assign_spyfall_roles(STATE, options)
+        assign_spyfall_roles(STATE, options, pids)
     if mode == "mafia":
         roles = assign_mafia_roles(
-            list(STATE.get("players", {}).keys()),
+            pids,
             seer_enabled=STATE.get("mafia_seer_enabled", True),
             auto_wolf_count=STATE.get("mafia_auto_wolf_count", True),
             wolf_count=STATE.get("mafia_wolf_count", 1),
         )
         STATE["mafia_roles"] = roles
-        STATE["mafia_alive"] = list(STATE.get("players", {}).keys())
+        # assign_mafia_roles only reads pids, so the round's pid list can be kept as-is.
+        STATE["mafia_alive"] = pids
         STATE["mafia_phase"] = "night"
     return True
 
 
 def set_manual_prompt_from_random_locked(mode: str) -> None:
+    # A preview draws from a throwaway copy of this mode's bag so the real deck is untouched;
+    # draw_from_pool only ever reads and pops the entries under this one key.
+    key = pool_key_for_mode(mode)
+    bags = STATE.get("prompt_bags", {})
+    last = STATE.get("prompt_last", {})
     preview_state = {
-        "prompt_bags": copy.deepcopy(STATE.get("prompt_bags", {})),
-        "prompt_last": copy.deepcopy(STATE.get("prompt_last", {})),
+        "prompt_bags": {key: list(bags[key])} if key in bags else {},
+        "prompt_last": {key: last[key]} if key in last else {},
     }
     prompt, options, correct_index = pick_prompt_for_mode(mode, preview_state)
     STATE["prompt_mode"] = "manual"
@@ -3394,13 +4096,15 @@ def set_manual_prompt_from_random_locked(mode: str) -> None:
         STATE["manual_correct_index"] = correct_index
 
 
+def utc_timestamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
 def build_history_entry(state: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
-    players = state.get("players", {})
-    def name_for(pid: str) -> str:
-        return players.get(pid, {}).get("name", "Unknown")
+    names = {pid: info.get("name", "Unknown") for pid, info in state.get("players", {}).items()}
 
     entry = {
-        "ts": datetime.datetime.utcnow().isoformat() + "Z",
+        "ts": utc_timestamp(),
         "round_id": result.get("round_id"),
         "mode": result.get("mode"),
         "prompt": result.get("prompt"),
@@ -3408,43 +4112,43 @@ def build_history_entry(state: Dict[str, Any], result: Dict[str, Any]) -> Dict[s
 
     mode = result.get("mode")
     if mode == "mlt":
-        entry["winners"] = [name_for(pid) for pid in result.get("winners", [])]
+        entry["winners"] = [names.get(pid, "Unknown") for pid in result.get("winners", [])]
         entry["max_votes"] = result.get("max_votes", 0)
     elif mode == "wyr":
         entry["tally"] = result.get("tally", {})
         entry["majority"] = result.get("majority")
     elif mode == "trivia":
-        entry["winners"] = [name_for(pid) for pid in result.get("winners", [])]
+        entry["winners"] = [names.get(pid, "Unknown") for pid in result.get("winners", [])]
         entry["correct_index"] = result.get("correct_index")
     elif mode in ("trivia_buzzer", "team_trivia"):
         buzz_pid = result.get("buzz_winner_pid")
         answer_pid = result.get("answer_pid")
-        entry["buzz_winner"] = name_for(buzz_pid) if buzz_pid else None
-        entry["answer"] = name_for(answer_pid) if answer_pid else None
+        entry["buzz_winner"] = names.get(buzz_pid, "Unknown") if buzz_pid else None
+        entry["answer"] = names.get(answer_pid, "Unknown") if answer_pid else None
         entry["correct_index"] = result.get("correct_index")
         entry["points"] = result.get("points", 0)
-        entry["scoring"] = [name_for(pid) for pid in result.get("scoring_pids", [])]
+        entry["scoring"] = [names.get(pid, "Unknown") for pid in result.get("scoring_pids", [])]
     elif mode == "hotseat":
         entry["answers"] = result.get("answers", [])
     elif mode == "quickdraw":
-        entry["unique_winners"] = [name_for(pid) for pid in result.get("unique_pids", [])]
+        entry["unique_winners"] = [names.get(pid, "Unknown") for pid in result.get("unique_pids", [])]
         entry["groups"] = result.get("groups", [])
     elif mode == "wavelength":
-        entry["winners"] = [name_for(pid) for pid in result.get("winners", [])]
+        entry["winners"] = [names.get(pid, "Unknown") for pid in result.get("winners", [])]
         entry["target"] = result.get("target")
     elif mode == "votebattle":
-        entry["winners"] = [name_for(pid) for pid in result.get("winners", [])]
+        entry["winners"] = [names.get(pid, "Unknown") for pid in result.get("winners", [])]
         entry["entries"] = result.get("entries", [])
     elif mode == "spyfall":
         spy_pid = result.get("spy_pid")
-        entry["spy"] = name_for(spy_pid) if spy_pid else "Unknown"
+        entry["spy"] = names.get(spy_pid, "Unknown") if spy_pid else "Unknown"
         entry["spy_caught"] = result.get("spy_caught", False)
-        entry["winners"] = [name_for(pid) for pid in result.get("winners", [])]
+        entry["winners"] = [names.get(pid, "Unknown") for pid in result.get("winners", [])]
         entry["tally"] = result.get("tally", {})
     elif mode == "mafia":
         entry["winner"] = result.get("winner")
         entry["roles"] = result.get("roles", {})
-        entry["alive"] = [name_for(pid) for pid in result.get("alive", [])]
+        entry["alive"] = [names.get(pid, "Unknown") for pid in result.get("alive", [])]
     return entry
 
 
@@ -3471,7 +4175,7 @@ def build_recap_payload(state: Dict[str, Any]) -> Dict[str, Any]:
         )
     players.sort(key=lambda row: (-row["score"], row["name"].lower()))
     return {
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "timestamp": utc_timestamp(),
         "players": players,
         "teams": get_team_scoreboard(state),
         "history": state.get("history", []),
@@ -3490,21 +4194,14 @@ def compute_results_locked() -> Dict[str, Any]:
     }
 
     if mode == "mlt":
-        tally = {pid: 0 for pid in players}
-        for _, target in submissions.items():
-            if target in tally:
-                tally[target] += 1
-        max_votes = max(tally.values()) if tally else 0
-        winners = [pid for pid, votes in tally.items() if votes == max_votes and votes > 0]
+        tally = build_tally(submissions, players)
+        winners, max_votes = pick_winners_from_tally(tally)
         for pid in winners:
             STATE["scores"][pid] = STATE["scores"].get(pid, 0) + 1
         result.update({"tally": tally, "winners": winners, "max_votes": max_votes})
 
     elif mode == "wyr":
-        tally = {0: 0, 1: 0}
-        for choice in submissions.values():
-            if choice in (0, 1):
-                tally[choice] += 1
+        tally = build_tally(submissions, (0, 1))
         majority = None
         if tally[0] > tally[1]:
             majority = 0
@@ -3523,11 +4220,7 @@ def compute_results_locked() -> Dict[str, Any]:
         )
 
     elif mode == "trivia":
-        option_count = len(STATE["options"])
-        tally = {idx: 0 for idx in range(option_count)}
-        for choice in submissions.values():
-            if isinstance(choice, int) and choice in tally:
-                tally[choice] += 1
+        tally = build_tally(submissions, range(len(STATE["options"])))
         correct = STATE.get("correct_index")
         winners = [pid for pid, choice in submissions.items() if choice == correct]
         for pid in winners:
@@ -3581,20 +4274,24 @@ def compute_results_locked() -> Dict[str, Any]:
         for pid, answer in submissions.items():
             name = players.get(pid, {}).get("name", "Unknown")
             answers.append({"pid": pid, "name": name, "answer": str(answer)})
+        answers.sort(key=lambda row: row["name"].lower())
         result.update({"answers": answers})
 
     elif mode == "quickdraw":
         answers = []
         normalized_map: Dict[str, List[str]] = {}
+        display_map: Dict[str, str] = {}
         for pid, answer in submissions.items():
             raw = str(answer).strip()
             normalized = normalize_text(raw)
             normalized_map.setdefault(normalized, []).append(pid)
+            display_map.setdefault(normalized, raw)
             answers.append(
                 {"pid": pid, "name": players.get(pid, {}).get("name", "Unknown"), "answer": raw, "normalized": normalized}
             )
 
-        unique_pids = set(unique_answer_pids(submissions))
+        answers.sort(key=lambda row: row["name"].lower())
+        unique_pids = [pids[0] for normalized, pids in normalized_map.items() if normalized and len(pids) == 1]
 
         if STATE.get("quickdraw_scoring") == "unique":
             for pid in unique_pids:
@@ -3606,11 +4303,10 @@ def compute_results_locked() -> Dict[str, Any]:
                 continue
             names = [players.get(pid, {}).get("name", "Unknown") for pid in pids]
             names.sort(key=lambda name: name.lower())
-            display = next((row["answer"] for row in answers if row["normalized"] == normalized), normalized)
             groups.append(
                 {
-                    "answer": display,
-                    "pids": list(pids),
+                    "answer": display_map[normalized],
+                    "pids": pids,
                     "names": names,
                     "count": len(pids),
                     "unique": len(pids) == 1,
@@ -3622,20 +4318,23 @@ def compute_results_locked() -> Dict[str, Any]:
             {
                 "answers": answers,
                 "groups": groups,
-                "unique_pids": list(unique_pids),
+                "unique_pids": unique_pids,
                 "scoring": STATE.get("quickdraw_scoring", "unique"),
             }
         )
 
     elif mode == "wavelength":
         target = STATE.get("wavelength_target")
+        has_target = isinstance(target, int)
         guesses = []
+        guess_total = 0
         for pid, guess in submissions.items():
             try:
                 guess_int = int(guess)
             except (TypeError, ValueError):
                 continue
-            distance = abs(guess_int - target) if isinstance(target, int) else None
+            guess_total += guess_int
+            distance = abs(guess_int - target) if has_target else None
             guesses.append(
                 {
                     "pid": pid,
@@ -3646,14 +4345,14 @@ def compute_results_locked() -> Dict[str, Any]:
             )
         guesses.sort(key=lambda row: (row["distance"] if row["distance"] is not None else 9999, row["name"].lower()))
         winner_pids: List[str] = []
-        if isinstance(target, int) and guesses:
-            closest = min(row["distance"] for row in guesses if row["distance"] is not None)
-            winner_pids = [row["pid"] for row in guesses if row["distance"] == closest and row["pid"] in players]
+        if has_target and guesses:
+            # Already sorted by distance, so the winners are the leading run of closest guesses.
+            closest = guesses[0]["distance"]
+            closest_rows = itertools.takewhile(lambda row: row["distance"] == closest, guesses)
+            winner_pids = [row["pid"] for row in closest_rows if row["pid"] in players]
             for pid in winner_pids:
                 STATE["scores"][pid] = STATE["scores"].get(pid, 0) + 1
-        average_guess = None
-        if guesses:
-            average_guess = sum(row["guess"] for row in guesses) / len(guesses)
+        average_guess = guess_total / len(guesses) if guesses else None
         result.update(
             {
                 "target": target,
@@ -3667,36 +4366,32 @@ def compute_results_locked() -> Dict[str, Any]:
         entries = []
         votes = STATE.get("votebattle_votes", {})
         order = STATE.get("votebattle_order", [])
-        counts: Dict[int, int] = {entry.get("id"): 0 for entry in order}
-        for _, entry_id in votes.items():
-            if entry_id in counts:
-                counts[entry_id] += 1
-        winners: List[str] = []
-        if counts:
-            max_votes = max(counts.values())
-            for entry in order:
-                entry_id = entry.get("id")
-                if counts.get(entry_id, 0) == max_votes and max_votes > 0:
-                    pid = entry.get("pid")
-                    if pid in players:
-                        winners.append(pid)
-        for pid in set(winners):
-            STATE["scores"][pid] = STATE["scores"].get(pid, 0) + 1
+        counts = Counter(votes.values())
+        max_votes = 0
         for entry in order:
             entry_id = entry.get("id")
+            entry_votes = counts[entry_id]
+            if entry_votes > max_votes:
+                max_votes = entry_votes
             entries.append(
                 {
                     "id": entry_id,
                     "pid": entry.get("pid"),
                     "text": entry.get("text", ""),
-                    "votes": counts.get(entry_id, 0),
+                    "votes": entry_votes,
                 }
             )
+        winners: List[str] = []
+        if max_votes > 0:
+            winners = [row["pid"] for row in entries if row["votes"] == max_votes and row["pid"] in players]
+        for pid in set(winners):
+            STATE["scores"][pid] = STATE["scores"].get(pid, 0) + 1
+        entries.sort(key=lambda row: (-row["votes"], row["text"].lower()))
         result.update({"entries": entries, "winners": winners})
 
     elif mode == "spyfall":
         spy_pid = STATE.get("spyfall_spy_pid")
-        tally = build_tally(submissions, list(players.keys()))
+        tally = build_tally(submissions, players)
         winners, max_votes = pick_winners_from_tally(tally)
         spy_caught = bool(spy_pid in winners and max_votes > 0)
         if spy_pid:
@@ -3723,7 +4418,7 @@ def compute_results_locked() -> Dict[str, Any]:
             {
                 "winner": winner,
                 "roles": STATE.get("mafia_roles", {}),
-                "alive": list(STATE.get("mafia_alive", [])),
+                "alive": STATE.get("mafia_alive", []),
                 "last_eliminated": STATE.get("mafia_last_eliminated"),
             }
         )
@@ -3737,16 +4432,16 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
     result = state.get("last_result")
     if not result:
         return None
-    players = state.get("players", {})
+    names = {pid: info.get("name", "Unknown") for pid, info in state.get("players", {}).items()}
     mode = result.get("mode")
     if mode == "mlt":
         tally = result.get("tally", {})
         rows = []
         for pid, votes in tally.items():
-            name = players.get(pid, {}).get("name", "Unknown")
+            name = names.get(pid, "Unknown")
             rows.append({"name": name, "votes": votes})
         rows.sort(key=lambda row: (-row["votes"], row["name"].lower()))
-        winners = [players.get(pid, {}).get("name", "Unknown") for pid in result.get("winners", [])]
+        winners = [names.get(pid, "Unknown") for pid in result.get("winners", [])]
         return {
             "mode": "mlt",
             "tally_rows": rows,
@@ -3784,11 +4479,11 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
         options = result.get("options", [])
         correct = result.get("correct_index")
         buzz_pid = result.get("buzz_winner_pid")
-        buzz_name = players.get(buzz_pid, {}).get("name", "Unknown") if buzz_pid else None
+        buzz_name = names.get(buzz_pid, "Unknown") if buzz_pid else None
         buzz_team_id = result.get("buzz_winner_team_id")
         buzz_team_label = state.get("team_names", {}).get(buzz_team_id, f"Team {buzz_team_id}") if buzz_team_id else None
         answer_pid = result.get("answer_pid")
-        answer_name = players.get(answer_pid, {}).get("name", "Unknown") if answer_pid else None
+        answer_name = names.get(answer_pid, "Unknown") if answer_pid else None
         answer_team_id = result.get("answer_team_id")
         answer_team_label = (
             state.get("team_names", {}).get(answer_team_id, f"Team {answer_team_id}") if answer_team_id else None
@@ -3800,13 +4495,13 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
         if isinstance(answer_choice, int) and 0 <= answer_choice < len(options):
             answer_label = f"{option_labels[answer_choice]}: {options[answer_choice]}"
         steal_pid = result.get("steal_pid")
-        steal_name = players.get(steal_pid, {}).get("name", "Unknown") if steal_pid else None
+        steal_name = names.get(steal_pid, "Unknown") if steal_pid else None
         steal_team_id = state.get("teams", {}).get(steal_pid) if steal_pid else None
         steal_team_label = (
             state.get("team_names", {}).get(steal_team_id, f"Team {steal_team_id}") if steal_team_id else None
         )
         scoring_pids = result.get("scoring_pids", [])
-        scoring_names = [players.get(pid, {}).get("name", "Unknown") for pid in scoring_pids]
+        scoring_names = [names.get(pid, "Unknown") for pid in scoring_pids]
         scoring_team_id = result.get("scoring_team_id")
         scoring_team_label = (
             state.get("team_names", {}).get(scoring_team_id, f"Team {scoring_team_id}") if scoring_team_id else None
@@ -3836,7 +4531,6 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
                     "answer": row.get("answer", ""),
                 }
             )
-        answers.sort(key=lambda row: row["name"].lower())
         return {"mode": "hotseat", "answers": answers}
     if mode == "quickdraw":
         answers = []
@@ -3848,7 +4542,6 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
                     "answer": row.get("answer", ""),
                 }
             )
-        answers.sort(key=lambda row: row["name"].lower())
         groups = []
         for row in result.get("groups", []):
             groups.append(
@@ -3859,7 +4552,6 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
                     "unique": row.get("unique", False),
                 }
             )
-        groups.sort(key=lambda row: (-row["count"], row["answer"].lower()))
         return {"mode": "quickdraw", "answer_groups": groups, "entries": answers}
     if mode == "wavelength":
         guesses = []
@@ -3873,8 +4565,7 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
                     "distance": row.get("distance"),
                 }
             )
-        guesses.sort(key=lambda row: (row["distance"] if row["distance"] is not None else 9999, row["name"].lower()))
-        winners = [players.get(pid, {}).get("name", "Unknown") for pid in result.get("winners", [])]
+        winners = [names.get(pid, "Unknown") for pid in result.get("winners", [])]
         return {
             "mode": "wavelength",
             "target": result.get("target"),
@@ -3893,19 +4584,18 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
                 "winner": pid in winners,
             }
             if reveal_authors:
-                entry["author"] = players.get(pid, {}).get("name", "Unknown")
+                entry["author"] = names.get(pid, "Unknown")
             entries.append(entry)
-        entries.sort(key=lambda row: (-row["votes"], row["text"].lower()))
-        winner_names = [players.get(pid, {}).get("name", "Unknown") for pid in winners]
+        winner_names = [names.get(pid, "Unknown") for pid in winners]
         return {"mode": "votebattle", "entries": entries, "winners": winner_names}
     if mode == "spyfall":
         tally = result.get("tally", {})
         rows = []
         for pid, votes in tally.items():
-            rows.append({"name": players.get(pid, {}).get("name", "Unknown"), "votes": votes})
+            rows.append({"name": names.get(pid, "Unknown"), "votes": votes})
         rows.sort(key=lambda row: (-row["votes"], row["name"].lower()))
         spy_pid = result.get("spy_pid")
-        spy_name = players.get(spy_pid, {}).get("name", "Unknown") if spy_pid else "Unknown"
+        spy_name = names.get(spy_pid, "Unknown") if spy_pid else "Unknown"
         return {
             "mode": "spyfall",
             "tally_rows": rows,
@@ -3917,7 +4607,7 @@ def build_results_view(state: Dict[str, Any], *, reveal_authors: bool = False) -
         roles = []
         if state.get("mafia_reveal_roles_on_end", True):
             for pid, role in result.get("roles", {}).items():
-                roles.append({"name": players.get(pid, {}).get("name", "Unknown"), "role": role})
+                roles.append({"name": names.get(pid, "Unknown"), "role": role})
             roles.sort(key=lambda row: row["name"].lower())
         return {
             "mode": "mafia",
@@ -4021,20 +4711,67 @@ def is_host_request() -> bool:
 def register_routes(app: Flask) -> None:
     
     
+    @app.after_request
+    def compress_response(response: Any) -> Any:
+        if response.mimetype not in GZIP_MIMETYPES or response.status_code != 200:
+            return response
+        response.vary.add("Accept-Encoding")
+        if response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers:
+            return response
+        if "gzip" not in request.accept_encodings:
+            return response
+        data = response.get_data()
+        if len(data) < GZIP_MIN_BYTES:
+            return response
+        compressed = STATIC_GZIP.get(data)
+        if compressed is None:
+            compressed = gzip.compress(data, compresslevel=6)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = "gzip"
+        return response
+    
+    
+    @app.get("/static/party.css")
+    def party_css() -> Any:
+        resp = make_response(PARTY_CSS)
+        resp.mimetype = "text/css"
+        resp.headers["Cache-Control"] = f"public, max-age={ASSET_CACHE_SECONDS}, immutable"
+        return resp
+    
+    
+    @app.get("/static/play.js")
+    def play_js() -> Any:
+        resp = make_response(PLAY_JS)
+        resp.mimetype = "text/javascript"
+        resp.headers["Cache-Control"] = f"public, max-age={ASSET_CACHE_SECONDS}, immutable"
+        return resp
+    
+    
     @app.get("/")
     def index() -> str:
         pid = request.cookies.get("pid")
-        snapshot = get_state_snapshot()
-        if pid and pid in snapshot.get("players", {}):
-            return redirect(url_for("play"))
+        with STATE_LOCK:
+            joined = bool(pid) and pid in STATE.get("players", {})
+            require_lobby_code = STATE.get("require_lobby_code", True)
+        if joined:
+            return redirect(get_page_urls()["play"])
         error = request.args.get("error")
+        if not error:
+            return render_static_page(
+                JOIN_BODY,
+                title=APP_TITLE,
+                body_class="player",
+                app_title=APP_TITLE,
+                require_lobby_code=require_lobby_code,
+                name_max_len=NAME_MAX_LEN,
+            )
         return render_page(
             JOIN_BODY,
             title=APP_TITLE,
             body_class="player",
             app_title=APP_TITLE,
             error=error,
-            require_lobby_code=snapshot.get("require_lobby_code", True),
+            require_lobby_code=require_lobby_code,
             name_max_len=NAME_MAX_LEN,
         )
     
@@ -4048,6 +4785,7 @@ def register_routes(app: Flask) -> None:
         lobby_code_input = (request.form.get("lobby_code") or "").strip()
         conflict_action = request.form.get("conflict_action") or ""
         pid = request.cookies.get("pid") or str(uuid.uuid4())
+        prefetch_moderation(name)
     
         with STATE_LOCK:
             if pid not in STATE["players"] and STATE.get("lobby_locked"):
@@ -4077,7 +4815,8 @@ def register_routes(app: Flask) -> None:
                             "ts": time.time(),
                         }
                     )
-                    resp = make_response(redirect(url_for("reclaim_wait")))
+                    mark_state_changed_locked()
+                    resp = make_response(redirect(get_page_urls()["reclaim_wait"]))
                     resp.set_cookie("pid", pid, max_age=60 * 60 * 24 * 30, samesite="Lax", httponly=True)
                     return resp
                 else:
@@ -4108,8 +4847,9 @@ def register_routes(app: Flask) -> None:
                     assign_team_for_new_player(STATE, pid)
             if pid not in STATE["scores"]:
                 STATE["scores"][pid] = 0
+            mark_state_changed_locked()
     
-        resp = make_response(redirect(url_for("play")))
+        resp = make_response(redirect(get_page_urls()["play"]))
         resp.set_cookie("pid", pid, max_age=60 * 60 * 24 * 30, samesite="Lax", httponly=True)
         return resp
     
@@ -4118,18 +4858,19 @@ def register_routes(app: Flask) -> None:
     def reclaim_wait() -> Any:
         pid = request.cookies.get("pid")
         if not pid:
-            return redirect(url_for("index"))
+            return redirect(get_page_urls()["index"])
         with STATE_LOCK:
             notice = STATE.get("reclaim_notices", {}).pop(pid, None)
             if pid in STATE.get("players", {}):
                 if notice:
                     return redirect(url_for("play", msg=notice))
-                return redirect(url_for("play"))
-        return render_page(
+                return redirect(get_page_urls()["play"])
+        return render_static_page(
             RECLAIM_WAIT_BODY,
             title=f"{APP_TITLE} - Reclaim",
             body_class="player",
             app_title=APP_TITLE,
+            poll_ms=PUBLIC_POLL_MS,
         )
     
     
@@ -4139,7 +4880,7 @@ def register_routes(app: Flask) -> None:
         snapshot = get_state_snapshot()
         player = snapshot.get("players", {}).get(pid or "")
         if not player:
-            return redirect(url_for("index"))
+            return redirect(get_page_urls()["index"])
         mode = snapshot.get("mode")
         phase = snapshot.get("phase")
         votebattle_phase = snapshot.get("votebattle_phase")
@@ -4171,8 +4912,8 @@ def register_routes(app: Flask) -> None:
         for player_id, info in snapshot.get("players", {}).items():
             player_choices.append({"pid": player_id, "name": info.get("name", "Unknown")})
         player_choices.sort(key=lambda row: row["name"].lower())
-        results_view = build_results_view(snapshot, reveal_authors=False) if snapshot.get("phase") == "revealed" else None
-        scoreboard = get_scoreboard(snapshot.get("players", {}), snapshot.get("scores", {}))
+        results_view = get_results_view(snapshot, False) if snapshot.get("phase") == "revealed" else None
+        scoreboard, team_scoreboard = get_snapshot_scoreboards(snapshot)
         message = request.args.get("msg")
         votebattle_choices = []
         if mode == "votebattle" and votebattle_phase == "vote":
@@ -4236,6 +4977,7 @@ def register_routes(app: Flask) -> None:
             PLAY_BODY,
             title=f"{APP_TITLE} - Play",
             body_class="player",
+            fragment=request.args.get("fragment") == "1",
             player_name=player.get("name", "Player"),
             team_label=get_team_label(snapshot, pid),
             pid=pid,
@@ -4251,7 +4993,7 @@ def register_routes(app: Flask) -> None:
             alive_choices=alive_players,
             results=results_view,
             scoreboard=scoreboard,
-            team_scoreboard=get_team_scoreboard(snapshot),
+            team_scoreboard=team_scoreboard,
             message=message,
             public_phase=phase,
             public_mode=mode,
@@ -4261,6 +5003,7 @@ def register_routes(app: Flask) -> None:
             public_mafia_phase=mafia_phase,
             public_trivia_buzzer_phase=snapshot.get("trivia_buzzer_phase"),
             public_poll_ms=PUBLIC_POLL_MS,
+            public_poll_max_ms=PUBLIC_POLL_MAX_MS,
             text_max_len=TEXT_MAX_LEN,
             quickdraw_max_len=QUICKDRAW_MAX_LEN,
             votebattle_max_len=VOTEBATTLE_MAX_LEN,
@@ -4303,17 +5046,22 @@ def register_routes(app: Flask) -> None:
     def submit() -> Any:
         pid = request.cookies.get("pid")
         if not pid:
-            return redirect(url_for("index"))
+            return redirect(get_page_urls()["index"])
     
         round_id_raw = request.form.get("round_id", "")
         try:
             round_id = int(round_id_raw)
         except ValueError:
             round_id = -1
+        with STATE_LOCK:
+            mode = STATE.get("mode")
+        text_field = TEXT_SUBMISSION_FIELDS.get(mode)
+        if text_field:
+            prefetch_moderation(clean_text_answer(request.form.get(text_field[0], ""), text_field[1]))
     
         with STATE_LOCK:
             if pid not in STATE["players"]:
-                return redirect(url_for("index"))
+                return redirect(get_page_urls()["index"])
             if STATE["phase"] != "in_round":
                 return redirect(url_for("play", msg="Round is not active."))
             if round_id != STATE["round_id"]:
@@ -4333,7 +5081,8 @@ def register_routes(app: Flask) -> None:
                 if target == pid and not STATE.get("spyfall_allow_self_vote", False):
                     return redirect(url_for("play", msg="You cannot vote for yourself."))
                 STATE["submissions"][pid] = target
-                return redirect(url_for("play"))
+                mark_state_changed_locked()
+                return redirect(get_page_urls()["play"])
     
             if mode == "mafia":
                 mafia_phase = STATE.get("mafia_phase")
@@ -4349,7 +5098,8 @@ def register_routes(app: Flask) -> None:
                         if target not in alive or target == pid:
                             return redirect(url_for("play", msg="Invalid target."))
                         STATE.setdefault("mafia_wolf_votes", {})[pid] = target
-                        return redirect(url_for("play"))
+                        mark_state_changed_locked()
+                        return redirect(get_page_urls()["play"])
                     if role == "seer":
                         if pid in STATE.get("mafia_seer_results", {}):
                             return redirect(url_for("play", msg="Already submitted."))
@@ -4358,7 +5108,8 @@ def register_routes(app: Flask) -> None:
                             return redirect(url_for("play", msg="Invalid target."))
                         is_werewolf = STATE.get("mafia_roles", {}).get(target) == "werewolf"
                         STATE.setdefault("mafia_seer_results", {})[pid] = {"target": target, "is_werewolf": is_werewolf}
-                        return redirect(url_for("play"))
+                        mark_state_changed_locked()
+                        return redirect(get_page_urls()["play"])
                     return redirect(url_for("play", msg="You are asleep."))
                 if mafia_phase == "day":
                     if pid in STATE.get("mafia_day_votes", {}):
@@ -4367,7 +5118,8 @@ def register_routes(app: Flask) -> None:
                     if target not in alive:
                         return redirect(url_for("play", msg="Invalid selection."))
                     STATE.setdefault("mafia_day_votes", {})[pid] = target
-                    return redirect(url_for("play"))
+                    mark_state_changed_locked()
+                    return redirect(get_page_urls()["play"])
                 return redirect(url_for("play", msg="Voting is not active."))
 
             if mode in ("trivia_buzzer", "team_trivia"):
@@ -4392,7 +5144,8 @@ def register_routes(app: Flask) -> None:
                     STATE["buzz_ts"] = winner_ts
                     if mode == "team_trivia":
                         STATE["buzz_winner_team_id"] = team_id
-                    return redirect(url_for("play"))
+                    mark_state_changed_locked()
+                    return redirect(get_page_urls()["play"])
 
                 if trivia_phase == "answer":
                     if STATE.get("answer_choice") is not None:
@@ -4415,7 +5168,8 @@ def register_routes(app: Flask) -> None:
                     STATE["answer_pid"] = pid
                     if mode == "team_trivia":
                         STATE["answer_team_id"] = STATE.get("teams", {}).get(pid)
-                    return redirect(url_for("play"))
+                    mark_state_changed_locked()
+                    return redirect(get_page_urls()["play"])
 
                 if trivia_phase == "steal":
                     if mode == "team_trivia":
@@ -4435,7 +5189,8 @@ def register_routes(app: Flask) -> None:
                     if choice < 0 or choice >= len(STATE.get("options", [])):
                         return redirect(url_for("play", msg="Invalid selection."))
                     STATE.setdefault("steal_attempts", {})[pid] = choice
-                    return redirect(url_for("play"))
+                    mark_state_changed_locked()
+                    return redirect(get_page_urls()["play"])
 
                 return redirect(url_for("play", msg="Buzzer phase is not active."))
 
@@ -4472,7 +5227,8 @@ def register_routes(app: Flask) -> None:
                     STATE["votebattle_votes"][pid] = entry_id
                 else:
                     return redirect(url_for("play", msg="Voting is not active."))
-                return redirect(url_for("play"))
+                mark_state_changed_locked()
+                return redirect(get_page_urls()["play"])
     
             if pid in STATE["submissions"]:
                 return redirect(url_for("play", msg="Already submitted."))
@@ -4522,8 +5278,9 @@ def register_routes(app: Flask) -> None:
                 STATE["submissions"][pid] = guess
             else:
                 return redirect(url_for("play", msg="Unknown mode."))
+            mark_state_changed_locked()
     
-        return redirect(url_for("play"))
+        return redirect(get_page_urls()["play"])
     
     @app.get("/host")
     def host() -> Any:
@@ -4540,7 +5297,7 @@ def register_routes(app: Flask) -> None:
                     host_url=host_url,
                 )
             if key == HOST_KEY:
-                resp = make_response(redirect(url_for("host")))
+                resp = make_response(redirect(get_page_urls()["host"]))
                 resp.set_cookie("host", HOST_KEY, httponly=True, samesite="Lax")
                 return resp
             return render_page(
@@ -4568,7 +5325,7 @@ def register_routes(app: Flask) -> None:
             )
     
         snapshot = get_state_snapshot()
-        join_qr_data = build_qr_data_url(join_url) if join_url else None
+        join_qr = build_qr_data_url(join_url) if join_url else None
         players = []
         for pid, info in snapshot.get("players", {}).items():
             players.append(
@@ -4579,9 +5336,8 @@ def register_routes(app: Flask) -> None:
                 }
             )
         players.sort(key=lambda row: row["name"].lower())
-        scoreboard = get_scoreboard(snapshot.get("players", {}), snapshot.get("scores", {}))
-        team_scoreboard = get_team_scoreboard(snapshot)
-        results_view = build_results_view(snapshot, reveal_authors=True) if snapshot.get("phase") == "revealed" else None
+        scoreboard, team_scoreboard = get_snapshot_scoreboards(snapshot)
+        results_view = get_results_view(snapshot, True) if snapshot.get("phase") == "revealed" else None
         submission_count = get_active_submission_count(snapshot)
         submission_names = get_active_submission_names(snapshot)
         submission_target = get_submission_target_count(snapshot)
@@ -4696,7 +5452,7 @@ def register_routes(app: Flask) -> None:
             manual_wavelength_target=snapshot.get("manual_wavelength_target"),
             manual_wavelength_target_enabled=snapshot.get("manual_wavelength_target_enabled", False),
             openai_enabled=openai_ready(),
-            mode_labels=MODE_LABELS,
+            mode_options=mode_options_html(snapshot.get("mode", "")),
             mode_descriptions=MODE_DESCRIPTIONS,
             wyr_points_majority=snapshot.get("wyr_points_majority", False),
             show_prompt_control=show_prompt_control,
@@ -4717,12 +5473,12 @@ def register_routes(app: Flask) -> None:
             trivia_buzzer_steal_enabled=snapshot.get("trivia_buzzer_steal_enabled", True),
             join_url=join_url,
             host_url=host_url,
-            join_qr_data=join_qr_data,
+            join_qr=join_qr,
             lobby_code=snapshot.get("lobby_code", ""),
             require_lobby_code=snapshot.get("require_lobby_code", True),
             teams_enabled=snapshot.get("teams_enabled", False),
             team_count=snapshot.get("team_count", 2),
-            team_names=snapshot.get("team_names", {}),
+            team_name_rows=get_team_name_rows(snapshot),
             filter_mode=snapshot.get("filter_mode", "mild"),
             openai_moderation_enabled=snapshot.get("openai_moderation_enabled", False),
             timer_enabled=snapshot.get("timer_enabled", False),
@@ -4744,122 +5500,49 @@ def register_routes(app: Flask) -> None:
             return "Host access required.", 403
     
         action = request.form.get("action", "")
-        if action == "generate_mlt":
-            if not openai_ready():
-                with STATE_LOCK:
-                    STATE["host_message"] = "OpenAI is not configured."
-                return redirect(url_for("host"))
-            prompts, err = generate_mlt_prompts()
-            with STATE_LOCK:
-                if prompts:
-                    global MLT_PROMPTS
-                    MLT_PROMPTS = prompts
-                    reset_pool(STATE, "mlt")
-                    STATE["host_message"] = f"Generated {len(prompts)} MLT prompts."
-                else:
-                    STATE["host_message"] = err or "Failed to generate prompts."
-            return redirect(url_for("host"))
-    
-        if action == "generate_wyr":
-            if not openai_ready():
-                with STATE_LOCK:
-                    STATE["host_message"] = "OpenAI is not configured."
-                return redirect(url_for("host"))
-            prompts, err = generate_wyr_prompts()
-            with STATE_LOCK:
-                if prompts:
-                    global WYR_PROMPTS
-                    WYR_PROMPTS = prompts
-                    reset_pool(STATE, "wyr")
-                    STATE["host_message"] = f"Generated {len(prompts)} WYR prompts."
-                else:
-                    STATE["host_message"] = err or "Failed to generate prompts."
-            return redirect(url_for("host"))
-    
-        if action == "generate_trivia":
-            if not openai_ready():
-                with STATE_LOCK:
-                    STATE["host_message"] = "OpenAI is not configured."
-                return redirect(url_for("host"))
-            questions, err = generate_trivia_questions()
-            with STATE_LOCK:
-                if questions:
-                    global TRIVIA_QUESTIONS
-                    TRIVIA_QUESTIONS = questions
-                    reset_pool(STATE, "trivia")
-                    STATE["host_message"] = f"Generated {len(questions)} trivia questions."
-                else:
-                    STATE["host_message"] = err or "Failed to generate trivia questions."
-            return redirect(url_for("host"))
-    
-        if action == "generate_hotseat":
-            if not openai_ready():
-                with STATE_LOCK:
-                    STATE["host_message"] = "OpenAI is not configured."
-                return redirect(url_for("host"))
-            prompts, err = generate_hotseat_prompts()
-            with STATE_LOCK:
-                if prompts:
-                    global HOTSEAT_PROMPTS
-                    HOTSEAT_PROMPTS = prompts
-                    reset_pool(STATE, "hotseat")
-                    STATE["host_message"] = f"Generated {len(prompts)} hot seat prompts."
-                else:
-                    STATE["host_message"] = err or "Failed to generate hot seat prompts."
-            return redirect(url_for("host"))
-    
-        if action == "generate_wavelength":
-            if not openai_ready():
-                with STATE_LOCK:
-                    STATE["host_message"] = "OpenAI is not configured."
-                return redirect(url_for("host"))
-            prompts, err = generate_wavelength_prompts()
-            with STATE_LOCK:
-                if prompts:
-                    global SPECTRUM_PROMPTS
-                    SPECTRUM_PROMPTS = prompts
-                    reset_pool(STATE, "wavelength")
-                    STATE["host_message"] = f"Generated {len(prompts)} wavelength prompts."
-                else:
-                    STATE["host_message"] = err or "Failed to generate wavelength prompts."
-            return redirect(url_for("host"))
-    
-        if action == "generate_quickdraw":
+        generate_mode = action[len("generate_") :] if action.startswith("generate_") else ""
+        if generate_mode in PROMPT_GENERATORS:
             if not openai_ready():
                 with STATE_LOCK:
                     STATE["host_message"] = "OpenAI is not configured."
-                return redirect(url_for("host"))
-            prompts, err = generate_quickdraw_prompts()
+                    mark_state_changed_locked()
+                return redirect(get_page_urls()["host"])
+            items, err = PROMPT_GENERATORS[generate_mode]()
+            noun = GENERATED_POOL_NOUNS[generate_mode]
             with STATE_LOCK:
-                if prompts:
-                    global QUICKDRAW_PROMPTS
-                    QUICKDRAW_PROMPTS = prompts
-                    reset_pool(STATE, "quickdraw")
-                    STATE["host_message"] = f"Generated {len(prompts)} quick draw prompts."
+                if items:
+                    install_generated_pool_locked(STATE, generate_mode, items)
+                    STATE["host_message"] = f"Generated {len(items)} {noun}."
                 else:
-                    STATE["host_message"] = err or "Failed to generate quick draw prompts."
-            return redirect(url_for("host"))
+                    STATE["host_message"] = err or f"Failed to generate {noun}."
+                mark_state_changed_locked()
+            return redirect(get_page_urls()["host"])
     
-        if action == "generate_votebattle":
+        if action == "generate_all":
             if not openai_ready():
                 with STATE_LOCK:
                     STATE["host_message"] = "OpenAI is not configured."
-                return redirect(url_for("host"))
-            prompts, err = generate_votebattle_prompts()
+                    mark_state_changed_locked()
+                return redirect(get_page_urls()["host"])
+            results = generate_all_content()
             with STATE_LOCK:
-                if prompts:
-                    global VOTEBATTLE_PROMPTS
-                    VOTEBATTLE_PROMPTS = prompts
-                    reset_pool(STATE, "votebattle")
-                    STATE["host_message"] = f"Generated {len(prompts)} vote battle prompts."
-                else:
-                    STATE["host_message"] = err or "Failed to generate vote battle prompts."
-            return redirect(url_for("host"))
-    
+                failed = []
+                for mode, (items, err) in results.items():
+                    if items:
+                        install_generated_pool_locked(STATE, mode, items)
+                    else:
+                        failed.append(MODE_LABELS.get(mode, mode))
+                message = f"Generated prompt pools for {len(results) - len(failed)} modes."
+                if failed:
+                    message += f" Failed: {', '.join(failed)}."
+                STATE["host_message"] = message
+                mark_state_changed_locked()
+            return redirect(get_page_urls()["host"])
+
         if action == "download_recap":
             with STATE_LOCK:
                 payload = build_recap_payload(STATE)
-            resp = make_response(json.dumps(payload, indent=2))
+            resp = make_response(json_dumps(payload, pretty=True))
             resp.headers["Content-Type"] = "application/json"
             resp.headers["Content-Disposition"] = "attachment; filename=party_recap.json"
             return resp
@@ -4877,14 +5560,15 @@ def register_routes(app: Flask) -> None:
                 )
                 if not resolved:
                     STATE["host_message"] = "No progress available."
-                    return redirect(url_for("host"))
+                    mark_state_changed_locked()
+                    return redirect(get_page_urls()["host"])
                 action = resolved
             if action == "set_mode":
                 mode = request.form.get("mode", "mlt")
                 if STATE["phase"] == "in_round":
                     STATE["host_message"] = "Cannot change mode during an active round."
                 elif mode in MODE_LABELS:
-                    STATE["mode"] = mode
+                    STATE["mode"] = sys.intern(mode)
                     STATE["votebattle_phase"] = None
                     STATE["votebattle_entries"] = {}
                     STATE["votebattle_votes"] = {}
@@ -5204,9 +5888,7 @@ def register_routes(app: Flask) -> None:
                     else:
                         reset_timer_locked(STATE, timer_seconds)
                 else:
-                    STATE["timer_start_ts"] = None
-                    STATE["timer_duration"] = None
-                    STATE["timer_expired"] = False
+                    stop_timer_locked(STATE)
                 STATE["host_message"] = "Timer settings saved."
     
             elif action == "set_teams":
@@ -5505,111 +6187,54 @@ def register_routes(app: Flask) -> None:
     
             else:
                 STATE["host_message"] = "Unknown action."
+            mark_state_changed_locked()
     
-        return redirect(url_for("host"))
+        return redirect(get_page_urls()["host"])
     
     
     @app.get("/api/state")
     def api_state() -> Any:
         if not is_host_request():
-            return jsonify({"error": "host required"}), 403
-        snapshot = get_state_snapshot()
-        submission_target = get_submission_target_count(snapshot)
-        progress_percent = int((get_active_submission_count(snapshot) / submission_target) * 100) if submission_target else 0
-        show_progress_button, progress_label = get_progress_ui(
-            snapshot.get("mode", ""),
-            snapshot.get("phase", ""),
-            snapshot.get("votebattle_phase"),
-            snapshot.get("spyfall_phase"),
-            snapshot.get("mafia_phase"),
-            snapshot.get("trivia_buzzer_phase"),
-        )
-        buzz_winner_pid = snapshot.get("buzz_winner_pid")
-        buzz_winner_name = snapshot.get("players", {}).get(buzz_winner_pid, {}).get("name") if buzz_winner_pid else ""
-        buzz_team_id = snapshot.get("buzz_winner_team_id")
-        buzz_team_label = snapshot.get("team_names", {}).get(buzz_team_id) if buzz_team_id else ""
-        buzz_winner_display = (
-            f"{buzz_winner_name} ({buzz_team_label})"
-            if buzz_winner_name and buzz_team_label
-            else buzz_winner_name
-            if buzz_winner_name
-            else "--"
-        )
-        answer_pid = snapshot.get("answer_pid")
-        answer_name = snapshot.get("players", {}).get(answer_pid, {}).get("name") if answer_pid else ""
-        answer_team_id = snapshot.get("answer_team_id")
-        answer_team_label = snapshot.get("team_names", {}).get(answer_team_id) if answer_team_id else ""
-        answer_display = (
-            f"{answer_name} ({answer_team_label})"
-            if answer_name and answer_team_label
-            else answer_name
-            if answer_name
-            else "--"
-        )
-        return jsonify(
-            {
-                "player_count": len(snapshot.get("players", {})),
-                "submission_count": get_active_submission_count(snapshot),
-                "submission_target": submission_target,
-                "progress_percent": progress_percent,
-                "submission_names": get_active_submission_names(snapshot),
-                "mode": snapshot.get("mode"),
-                "mode_label": label_for_mode(snapshot.get("mode", "")),
-                "phase": snapshot.get("phase"),
-                "phase_label": label_for_phase(snapshot.get("phase", "")),
-                "round_id": snapshot.get("round_id", 0),
-                "prompt": snapshot.get("prompt", ""),
-                "options": snapshot.get("options", []),
-                "lobby_locked": snapshot.get("lobby_locked", False),
-                "allow_renames": snapshot.get("allow_renames", True),
-                "wavelength_target": snapshot.get("wavelength_target"),
-                "votebattle_phase": snapshot.get("votebattle_phase"),
-                "votebattle_submit_count": len(snapshot.get("votebattle_entries", {})),
-                "votebattle_vote_count": len(snapshot.get("votebattle_votes", {})),
-                "spyfall_phase": snapshot.get("spyfall_phase"),
-                "mafia_phase": snapshot.get("mafia_phase"),
-                "trivia_buzzer_phase": snapshot.get("trivia_buzzer_phase"),
-                "submissions_locked": snapshot.get("submissions_locked", False),
-                "timer_remaining": get_timer_remaining(snapshot),
-                "show_progress_button": show_progress_button,
-                "progress_label": progress_label,
-                "buzz_winner_display": buzz_winner_display,
-                "answer_display": answer_display,
-            }
-        )
+            return json_response({"error": "host required"}, 403)
+        with STATE_LOCK:
+            etag, body = get_state_json_locked(build_host_state, STATE)
+        return json_response(body, etag=etag)
     
     
     @app.get("/api/public_state")
     def api_public_state() -> Any:
-        snapshot = get_state_snapshot()
-        return jsonify(
-            {
-                "phase": snapshot.get("phase"),
-                "mode": snapshot.get("mode"),
-                "round_id": snapshot.get("round_id", 0),
-                "votebattle_phase": snapshot.get("votebattle_phase"),
-                "spyfall_phase": snapshot.get("spyfall_phase"),
-                "mafia_phase": snapshot.get("mafia_phase"),
-                "trivia_buzzer_phase": snapshot.get("trivia_buzzer_phase"),
-                "submissions_locked": snapshot.get("submissions_locked", False),
-                "timer_remaining": get_timer_remaining(snapshot),
-            }
-        )
+        with STATE_LOCK:
+            etag, body = get_state_json_locked(build_public_state, STATE)
+        return json_response(body, etag=etag)
+    
+    
+    @app.get("/api/events")
+    def api_events() -> Any:
+        return event_stream_response(build_public_state)
+    
+    
+    @app.get("/api/host_events")
+    def api_host_events() -> Any:
+        if not is_host_request():
+            return json_response({"error": "host required"}, 403)
+        return event_stream_response(build_host_state, tick=True)
     
     
     @app.get("/api/host_timer")
     def api_host_timer() -> Any:
         if not is_host_request():
-            return jsonify({"error": "host required"}), 403
+            return json_response({"error": "host required"}, 403)
         with STATE_LOCK:
             remaining = tick_timer_locked(STATE)
             locked = STATE.get("submissions_locked", False)
-        return jsonify({"timer_remaining": remaining, "submissions_locked": locked})
+            etag = f"{BOOT_ID}-{STATE_VERSION}-{remaining}"
+        return json_response({"timer_remaining": remaining, "submissions_locked": locked}, etag=etag)
 
 
 if FLASK_AVAILABLE:
     app = Flask(__name__)
     register_routes(app)
+    compile_page_templates(app)
 else:
     app = None
 
@@ -5625,7 +6250,7 @@ def print_startup_info(port: int, lobby_code: str) -> Tuple[str, str]:
     print("  .venv\\Scripts\\activate")
     print("  pip install flask waitress")
     print("Optional:")
-    print("  pip install openai qrcode[pil]")
+    print("  pip install openai qrcode[pil] orjson")
     print("  set OPENAI_API_KEY=your_key")
     print("Networking tips:")
     print("  ipconfig  (look for IPv4 Address)")
@@ -5663,8 +6288,10 @@ class PartyHubTests(unittest.TestCase):
         self._state_backup = copy.deepcopy(STATE)
 
     def tearDown(self) -> None:
-        STATE.clear()
-        STATE.update(copy.deepcopy(self._state_backup))
+        with STATE_LOCK:
+            STATE.clear()
+            STATE.update(copy.deepcopy(self._state_backup))
+            mark_state_changed_locked()
 
     def test_normalize_text(self) -> None:
         self.assertEqual(normalize_text("  The   Quick  "), "quick")
@@ -5675,9 +6302,15 @@ class PartyHubTests(unittest.TestCase):
         self.assertFalse(contains_banned_word("This is darn", "off"))
 
     def test_unique_answer_scoring(self) -> None:
-        submissions = {"p1": "Apple", "p2": "apple", "p3": "Banana"}
-        unique = unique_answer_pids(submissions)
-        self.assertEqual(set(unique), {"p3"})
+        with STATE_LOCK:
+            STATE["mode"] = "quickdraw"
+            STATE["quickdraw_scoring"] = "unique"
+            STATE["players"] = {pid: {"name": pid} for pid in ("p1", "p2", "p3")}
+            STATE["scores"] = {}
+            STATE["submissions"] = {"p1": "Apple", "p2": "apple", "p3": "Banana"}
+            result = compute_results_locked()
+        self.assertEqual(result["unique_pids"], ["p3"])
+        self.assertEqual(STATE["scores"], {"p3": 1})
 
     def test_lobby_code_validation(self) -> None:
         self.assertTrue(validate_lobby_code("ab cd", "ABCD", True))
@@ -5784,10 +6417,18 @@ class PartyHubTests(unittest.TestCase):
             STATE["lobby_locked"] = False
             STATE["require_lobby_code"] = False
             STATE["lobby_code"] = "ABCDE"
+            STATE["phase"] = "lobby"
+            version = STATE_VERSION
         client = app.test_client()
         resp = client.post("/join", data={"name": "Alice", "lobby_code": ""})
         self.assertEqual(resp.status_code, 302)
         self.assertIn("pid=", resp.headers.get("Set-Cookie", ""))
+        self.assertGreater(STATE_VERSION, version)
+
+        # A rejected POST leaves the state, and so the published version, untouched.
+        version = STATE_VERSION
+        client.post("/submit", data={"round_id": "-1"})
+        self.assertEqual(STATE_VERSION, version)
 
         resp_remote = client.get(f"/host?key={HOST_KEY}", environ_base={"REMOTE_ADDR": "1.2.3.4"})
         self.assertNotIn("host=", resp_remote.headers.get("Set-Cookie", ""))
@@ -5795,11 +6436,114 @@ class PartyHubTests(unittest.TestCase):
         resp_local = client.get(f"/host?key={HOST_KEY}", environ_base={"REMOTE_ADDR": "127.0.0.1"})
         self.assertIn("host=", resp_local.headers.get("Set-Cookie", ""))
 
+    @unittest.skipUnless(FLASK_AVAILABLE, "Flask not installed")
+    def test_public_event_stream(self) -> None:
+        with STATE_LOCK:
+            STATE["phase"] = "lobby"
+            mark_state_changed_locked()
+        client = app.test_client()
+        resp = client.get("/api/events", buffered=False)
+        self.assertEqual(resp.mimetype, "text/event-stream")
+        chunks = iter(resp.response)
+        self.assertTrue(next(chunks).startswith(b"retry:"))
+        event = next(chunks).decode("utf-8")
+        resp.close()
+        self.assertIn(f"id: {BOOT_ID}-{STATE_VERSION}", event)
+        data = json.loads(event.split("data: ", 1)[1])
+        self.assertEqual(data.get("phase"), "lobby")
+        resp = client.get("/api/host_events", environ_base={"REMOTE_ADDR": "1.2.3.4"})
+        self.assertEqual(resp.status_code, 403)
+
+    @unittest.skipUnless(FLASK_AVAILABLE, "Flask not installed")
+    def test_event_stream_falls_back_when_full(self) -> None:
+        client = app.test_client()
+        set_event_stream_limit(1)
+        try:
+            held = client.get("/api/events", buffered=False)
+            self.assertEqual(held.status_code, 200)
+            self.assertEqual(client.get("/api/events").status_code, 204)
+            held.close()
+            resp = client.get("/api/events", buffered=False)
+            self.assertEqual(resp.status_code, 200)
+            resp.close()
+        finally:
+            set_event_stream_limit(SSE_MAX_STREAMS)
+
+    def test_event_stream_sends_changed_keys(self) -> None:
+        stream = state_event_stream(build_public_state, -1)
+        next(stream)
+        first = json.loads(next(stream).decode("utf-8").split("data: ", 1)[1])
+        self.assertIn("mode", first)
+        with STATE_LOCK:
+            STATE["phase"] = "revealed" if STATE.get("phase") != "revealed" else "lobby"
+            mark_state_changed_locked()
+        delta = json.loads(next(stream).decode("utf-8").split("data: ", 1)[1])
+        self.assertEqual(delta, {"phase": STATE["phase"]})
+
+    def test_host_event_stream_timer_expiry(self) -> None:
+        with STATE_LOCK:
+            STATE["timer_enabled"] = True
+            STATE["timer_deadline_ns"] = time.monotonic_ns() + 100_000_000
+            STATE["timer_expired"] = False
+            version = STATE_VERSION
+        stream = state_event_stream(build_host_state, version, tick=True)
+        next(stream)
+        event = next(stream).decode("utf-8")
+        self.assertTrue(STATE["timer_expired"])
+        self.assertEqual(json.loads(event.split("data: ", 1)[1]).get("timer_remaining"), 0)
+
+    @unittest.skipUnless(FLASK_AVAILABLE, "Flask not installed")
+    def test_public_state_etag(self) -> None:
+        client = app.test_client()
+        resp = client.get("/api/public_state")
+        etag = resp.headers.get("ETag")
+        self.assertTrue(etag)
+        resp = client.get("/api/public_state", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.data, b"")
+        with STATE_LOCK:
+            mark_state_changed_locked()
+        resp = client.get("/api/public_state", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+
+    @unittest.skipUnless(FLASK_AVAILABLE, "Flask not installed")
+    def test_play_fragment(self) -> None:
+        with STATE_LOCK:
+            STATE["players"] = {}
+            STATE["scores"] = {}
+            STATE["lobby_locked"] = False
+            STATE["require_lobby_code"] = False
+        client = app.test_client()
+        client.post("/join", data={"name": "Alice", "lobby_code": ""})
+        page = client.get("/play").get_data(as_text=True)
+        fragment = client.get("/play?fragment=1").get_data(as_text=True)
+        self.assertIn("<html", page)
+        self.assertNotIn("<html", fragment)
+        self.assertIn('data-phase="lobby"', fragment)
+        self.assertIn(fragment.strip(), page)
+
+    @unittest.skipUnless(FLASK_AVAILABLE, "Flask not installed")
+    def test_html_gzip(self) -> None:
+        client = app.test_client()
+        plain = client.get("/")
+        self.assertNotIn("Content-Encoding", plain.headers)
+        resp = client.get("/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers.get("Content-Encoding"), "gzip")
+        self.assertIn("Accept-Encoding", resp.headers.get("Vary", ""))
+        self.assertEqual(gzip.decompress(resp.data), plain.data)
+        self.assertEqual(STATIC_GZIP.get(plain.data), resp.data)
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Party Hub server")
     parser.add_argument("--port", type=int, default=5000, help="Port to listen on")
     parser.add_argument("--test", action="store_true", help="Run tests and exit")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=SERVER_THREADS,
+        help=f"Worker threads for waitress; all but {SSE_REQUEST_THREADS} may hold open event streams",
+    )
     args = parser.parse_args()
 
     if args.test:
@@ -5817,6 +6561,7 @@ def main() -> None:
     app.config["JOIN_URL"] = join_url
     app.config["HOST_URL"] = host_url
     app.config["PORT"] = args.port
+    build_qr_data_url(join_url)
 
     try:
         from waitress import serve  # type: ignore
@@ -5824,7 +6569,9 @@ def main() -> None:
         print("Waitress is not installed. Run: pip install waitress")
         raise SystemExit(1)
 
-    serve(app, host="0.0.0.0", port=args.port, threads=8)
+    threads = max(1, args.threads)
+    set_event_stream_limit(min(SSE_MAX_STREAMS, threads - SSE_REQUEST_THREADS))
+    serve(app, host="0.0.0.0", port=args.port, threads=threads)
 
 
 if __name__ == "__main__":